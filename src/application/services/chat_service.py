@@ -62,13 +62,40 @@ class ChatService:
         ):
             yield chunk
 
-    async def index_repositories(self) -> dict:
+    async def index_repositories(self, force: bool = False) -> dict:
         """Manually trigger repository re-indexing.
 
+        Args:
+            force: Clear the index and rebuild every repository from scratch
+
+        Returns:
+            Statistics about the indexing operation
+        """
+        return await self.chat_graph.index_repositories(force=force)
+
+    async def index_repository(self, repo_name: str, branch: str = "main") -> dict:
+        """Re-index a single repository, fetching only changed files.
+
+        Args:
+            repo_name: Name of the repository to re-index
+            branch: Branch to index
+
         Returns:
             Statistics about the indexing operation
         """
-        return await self.chat_graph.index_repositories()
+        return await self.chat_graph.index_repository(repo_name, branch)
+
+    async def rollback_index(self) -> dict:
+        """Switch back to the index generation served before the last full rebuild.
+
+        Returns:
+            Statistics about the restored index
+        """
+        from src.infrastructure.ai.vectorstore.faiss_store import get_vector_store
+
+        vector_store = get_vector_store()
+        await vector_store.rollback()
+        return await vector_store.get_stats()
 
     async def get_index_stats(self) -> dict:
         """Get statistics about the indexed repositories.
@@ -76,7 +103,12 @@ class ChatService:
         Returns:
             Statistics about indexed documents
         """
+        from src.infrastructure.ai.mcp.github_client import get_github_client
         from src.infrastructure.ai.vectorstore.faiss_store import get_vector_store
 
         vector_store = get_vector_store()
-        return await vector_store.get_stats()
+        stats = await vector_store.get_stats()
+        stats["github_connections"] = get_github_client().get_connection_stats()
+        stats["github_cache"] = get_github_client().get_cache_stats()
+        stats["github_fetch"] = get_github_client().get_fetch_stats()
+        return stats
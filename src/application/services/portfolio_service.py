@@ -4,6 +4,8 @@ import httpx
 from typing import List, Dict, Any
 from datetime import datetime, timedelta
 
+from src.infrastructure.external.http_cache import cached_transport
+
 
 class PortfolioService:
     """Service for fetching and caching GitHub repository data."""
@@ -54,19 +56,25 @@ class PortfolioService:
         if self.github_token:
             headers["Authorization"] = f"Bearer {self.github_token}"
 
-        url = f"https://api.github.com/users/{self.github_username}/repos"
-        params = {
+        url: str | None = f"https://api.github.com/users/{self.github_username}/repos"
+        params: Dict[str, Any] | None = {
             "type": "public",
             "sort": "updated",
             "per_page": 100,
         }
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=headers, params=params)
-            if response.status_code != 200:
-                return []
+        # Revalidated through the shared GitHub response cache, so an
+        # unchanged listing costs a 304 that does not count against the rate limit.
+        async with httpx.AsyncClient(transport=cached_transport()) as client:
+            repos: List[Dict[str, Any]] = []
+            while url:
+                response = await client.get(url, headers=headers, params=params)
+                if response.status_code != 200:
+                    return []
+
+                repos.extend(response.json())
+                url, params = response.links.get("next", {}).get("url"), None
 
-            repos = response.json()
             return [
                 {
                     "name": repo["name"],
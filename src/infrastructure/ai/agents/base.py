@@ -27,6 +27,7 @@ class ChatState(TypedDict):
     next_agent: str
     agent_output: str
     conversation_history: list[dict]
+    code_index_ready: bool
 
 
 def get_llm(temperature: float = 0.7) -> ChatGoogleGenerativeAI:
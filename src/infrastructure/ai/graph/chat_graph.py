@@ -1,5 +1,8 @@
 """LangGraph workflow for multi-agent chat system."""
 
+import asyncio
+import random
+import time
 from typing import AsyncGenerator
 
 from langchain_core.messages import HumanMessage, AIMessage
@@ -20,7 +23,23 @@ from src.infrastructure.ai.vectorstore.faiss_store import (
     CodeDocument,
     get_vector_store,
 )
-from src.infrastructure.ai.mcp.github_client import get_github_client
+from src.infrastructure.ai.mcp.repository_source import get_repository_source
+from src.infrastructure.config.settings import get_settings
+
+INDEX_NOT_READY_CONTEXT = (
+    "The code of my repositories is still being indexed, so no code search "
+    "results are available yet. Answer from my bio and blog only, and mention "
+    "that questions about my code can be answered again in a few minutes."
+)
+
+
+async def index_not_ready_node(state: ChatState) -> ChatState:
+    """Stand in for the repo investigator until the code index is ready."""
+    return {
+        **state,
+        "agent_output": INDEX_NOT_READY_CONTEXT,
+        "next_agent": AgentType.RESPONSE_GENERATOR.value,
+    }
 
 
 def route_to_agent(state: ChatState) -> str:
@@ -28,6 +47,8 @@ def route_to_agent(state: ChatState) -> str:
     next_agent = state.get("next_agent", AgentType.RESPONSE_GENERATOR.value)
 
     if next_agent == AgentType.REPO_INVESTIGATOR.value:
+        if not state.get("code_index_ready", True):
+            return "index_not_ready"
         return "repo_investigator"
     elif next_agent == AgentType.BLOG_EXPLAINER.value:
         return "blog_explainer"
@@ -48,9 +69,17 @@ def should_end(state: ChatState) -> str:
 class ChatGraph:
     """LangGraph-based multi-agent chat system."""
 
+    # Backoff in seconds between startup attempts after a failure.
+    STARTUP_RETRY_DELAY = 5.0
+    STARTUP_RETRY_MAX_DELAY = 300.0
+
     def __init__(self) -> None:
         self.graph = self._build_graph()
         self._initialized = False
+        self._startup: asyncio.Task[None] | None = None
+        self._startup_failures = 0
+        self._startup_retry_at = 0.0
+        self.startup_error: str | None = None
 
     def _build_graph(self) -> StateGraph:
         """Build the LangGraph workflow."""
@@ -58,6 +87,7 @@ class ChatGraph:
 
         workflow.add_node("orchestrator", orchestrator_node)
         workflow.add_node("repo_investigator", repo_investigator_node)
+        workflow.add_node("index_not_ready", index_not_ready_node)
         workflow.add_node("blog_explainer", blog_explainer_node)
         workflow.add_node("leaderboard_explainer", leaderboard_explainer_node)
         workflow.add_node("response_generator", response_generator_node)
@@ -69,6 +99,7 @@ class ChatGraph:
             route_to_agent,
             {
                 "repo_investigator": "repo_investigator",
+                "index_not_ready": "index_not_ready",
                 "blog_explainer": "blog_explainer",
                 "leaderboard_explainer": "leaderboard_explainer",
                 "response_generator": "response_generator",
@@ -102,10 +133,62 @@ class ChatGraph:
             },
         )
 
+        workflow.add_edge("index_not_ready", "response_generator")
         workflow.add_edge("response_generator", END)
 
         return workflow.compile()
 
+    @property
+    def index_ready(self) -> bool:
+        """Whether the code index is loaded and its initial indexing has finished."""
+        return self._initialized
+
+    def start(self) -> None:
+        """Run :meth:`initialize` in the background.
+
+        Loading the index, and indexing every repository when it is empty,
+        can take minutes; meanwhile chat answers without code search. After
+        a failed startup, the next call starts another attempt once an
+        exponentially growing backoff has passed.
+        """
+        if self._initialized:
+            return
+        if self._startup is None or (
+            self._startup.done()
+            and self.startup_error is not None
+            and time.monotonic() >= self._startup_retry_at
+        ):
+            self._startup = asyncio.create_task(self._start())
+
+    async def _start(self) -> None:
+        try:
+            await self.initialize()
+        except Exception as e:
+            self.startup_error = str(e)
+            self._startup_failures += 1
+            delay = min(
+                self.STARTUP_RETRY_MAX_DELAY,
+                self.STARTUP_RETRY_DELAY * 2 ** (self._startup_failures - 1),
+            )
+            self._startup_retry_at = time.monotonic() + delay
+            print(
+                f"Warning: Failed to initialize AI chat system: {e} "
+                f"(retrying after {delay:.0f}s)"
+            )
+        else:
+            self.startup_error = None
+            self._startup_failures = 0
+
+    async def stop(self) -> None:
+        """Cancel a startup still in progress and stop watching the index."""
+        if self._startup is not None and not self._startup.done():
+            self._startup.cancel()
+            try:
+                await self._startup
+            except asyncio.CancelledError:
+                pass
+        await get_vector_store().stop_watching()
+
     async def initialize(self) -> None:
         """Initialize the chat graph and index repositories."""
         if self._initialized:
@@ -115,6 +198,7 @@ class ChatGraph:
 
         vector_store = get_vector_store()
         await vector_store.initialize()
+        vector_store.start_watching()
 
         stats = await vector_store.get_stats()
         if stats["total_documents"] == 0:
@@ -126,54 +210,169 @@ class ChatGraph:
         self._initialized = True
         print("AI chat system initialized successfully!")
 
-    async def index_repositories(self) -> dict:
-        """Index all GitHub repositories into the vector store."""
-        github_client = get_github_client()
+    async def index_repositories(self, force: bool = False) -> dict:
+        """Incrementally index all GitHub repositories into the vector store.
+
+        Only files whose git blob SHA changed since the last run are fetched
+        and embedded, and repositories that no longer exist are dropped.
+        With ``force`` everything is rebuilt into a shadow generation that is
+        swapped in once complete, so searches keep using the current index
+        meanwhile and the previous one is kept for rollback. A rebuild that
+        ends up empty, e.g. because the repository listing failed, or that
+        misses repositories which failed to index is discarded instead, and
+        raises ``RuntimeError`` while the current index stays in place.
+        """
         vector_store = get_vector_store()
+        if not force:
+            return await self._index_repositories(vector_store)
+
+        shadow = await vector_store.shadow()
+        try:
+            result = await self._index_repositories(shadow)
+            stats = await shadow.get_stats()
+        except BaseException:
+            await vector_store.discard(shadow)
+            raise
+
+        if result["repositories_failed"] or stats["total_documents"] == 0:
+            await vector_store.discard(shadow)
+            reason = (
+                f"repositories failed: {', '.join(result['repositories_failed'])}"
+                if result["repositories_failed"]
+                else "no documents were indexed"
+            )
+            print(f"Discarding full rebuild, {reason}")
+            raise RuntimeError(f"Full rebuild discarded, the current index is kept ({reason})")
+
+        await vector_store.swap(shadow)
+        return result
+
+    async def _index_repositories(self, vector_store: FAISSVectorStore) -> dict:
+        """Index every repository into ``vector_store``.
+
+        Up to ``INDEX_MAX_CONCURRENT_REPOS`` repositories are indexed at
+        once; their file requests and embedding batches still go through the
+        shared fetch and embedding schedulers, which bound them globally. A
+        failing repository is retried and otherwise reported without
+        affecting the others.
+        """
+        settings = get_settings()
+        source = get_repository_source()
+
+        repos = await source.get_repositories()
+        print(f"Found {len(repos)} repositories to index")
 
-        await vector_store.clear()
+        semaphore = asyncio.Semaphore(max(1, settings.index_max_concurrent_repos))
 
-        repos = await github_client.get_repositories()
-        print(f"Found {len(repos)} repositories to index")
+        async def index_repo(repo: dict) -> dict | None:
+            repo_name = repo["name"]
+            async with semaphore:
+                for attempt in range(settings.index_repo_retries + 1):
+                    print(f"Indexing repository: {repo_name}")
+                    try:
+                        return await self.index_repository(
+                            repo_name, repo.get("default_branch", "main"), vector_store
+                        )
+                    except Exception as e:
+                        if attempt == settings.index_repo_retries:
+                            print(f"  Error indexing {repo_name}: {e}")
+                            return None
+                        delay = 2**attempt * random.uniform(0.5, 1.5)
+                        print(f"  Error indexing {repo_name}: {e}; retrying in {delay:.1f}s")
+                        await asyncio.sleep(delay)
+            return None
+
+        results = await asyncio.gather(*(index_repo(repo) for repo in repos))
 
         total_files = 0
+        files_removed = 0
+        files_unchanged = 0
         indexed_repos: list[str] = []
+        failed_repos: list[str] = []
 
-        for repo in repos:
+        for repo, result in zip(repos, results):
             repo_name = repo["name"]
-            print(f"Indexing repository: {repo_name}")
+            if result is None:
+                failed_repos.append(repo_name)
+                continue
 
-            try:
-                files = await github_client.index_repository(
-                    repo_name, repo.get("default_branch", "main")
-                )
-
-                if files:
-                    documents = [
-                        CodeDocument(
-                            content=f["content"],
-                            project_name=f["project_name"],
-                            folder_path=f["folder_path"],
-                            file_name=f["file_name"],
-                            file_type=f["file_type"],
-                            file_url=f["file_url"],
-                        )
-                        for f in files
-                    ]
+            total_files += result["files_updated"]
+            files_removed += result["files_removed"]
+            files_unchanged += result["files_unchanged"]
+            if result["files_updated"] or result["files_unchanged"]:
+                indexed_repos.append(repo_name)
 
-                    await vector_store.add_documents(documents)
-                    total_files += len(files)
-                    indexed_repos.append(repo_name)
-                    print(f"  Indexed {len(files)} files from {repo_name}")
+        if repos:
+            stats = await vector_store.get_stats()
+            current = {repo["name"] for repo in repos}
+            for project_name in set(stats["projects"]) - current:
+                print(f"Removing repository that no longer exists: {project_name}")
+                await vector_store.remove_project(project_name)
 
-            except Exception as e:
-                print(f"  Error indexing {repo_name}: {e}")
-                continue
+        await vector_store.compact()
 
         return {
             "repositories_indexed": len(indexed_repos),
             "total_files": total_files,
+            "files_removed": files_removed,
+            "files_unchanged": files_unchanged,
             "repositories": indexed_repos,
+            "repositories_failed": failed_repos,
+        }
+
+    async def index_repository(
+        self,
+        repo_name: str,
+        branch: str = "main",
+        vector_store: FAISSVectorStore | None = None,
+    ) -> dict:
+        """Re-index a single repository, touching only added, changed or deleted files.
+
+        Writes to the live vector store unless another ``vector_store``, such
+        as a shadow generation, is given.
+        """
+        source = get_repository_source()
+        vector_store = vector_store or get_vector_store()
+
+        tree = await source.get_repository_tree(repo_name, branch)
+        if not tree:
+            return {
+                "repository": repo_name,
+                "files_updated": 0,
+                "files_removed": 0,
+                "files_unchanged": 0,
+            }
+
+        known_shas = await vector_store.get_file_shas(repo_name)
+        current_paths = {item["path"] for item in tree}
+        changed = [item for item in tree if known_shas.get(item["path"]) != item["sha"]]
+        removed_paths = set(known_shas) - current_paths
+
+        files_updated = 0
+        documents: list[CodeDocument] = []
+        empty_files: dict[str, str] = {}
+        if changed:
+            async for indexed_file in source.stream_files(repo_name, changed, branch):
+                files_updated += 1
+                chunks = CodeDocument.from_file(indexed_file)
+                if not chunks:
+                    path = f"{indexed_file['folder_path']}/{indexed_file['file_name']}"
+                    empty_files[path.lstrip("/")] = indexed_file["blob_sha"]
+                documents.extend(chunks)
+
+        if documents or removed_paths or empty_files:
+            await vector_store.replace_files(repo_name, documents, removed_paths, empty_files)
+
+        print(
+            f"  {repo_name}: {files_updated} files updated ({len(documents)} chunks), "
+            f"{len(removed_paths)} removed, {len(tree) - len(changed)} unchanged"
+        )
+
+        return {
+            "repository": repo_name,
+            "files_updated": files_updated,
+            "files_removed": len(removed_paths),
+            "files_unchanged": len(tree) - len(changed),
         }
 
     async def chat(
@@ -181,9 +380,12 @@ class ChatGraph:
         message: str,
         conversation_history: list[dict] | None = None,
     ) -> str:
-        """Process a chat message and return a response."""
-        if not self._initialized:
-            await self.initialize()
+        """Process a chat message and return a response.
+
+        Until the code index is ready, repository questions are answered
+        from the bio and blog only.
+        """
+        self.start()
 
         messages: list[HumanMessage | AIMessage] = []
 
@@ -201,6 +403,7 @@ class ChatGraph:
             "next_agent": "",
             "agent_output": "",
             "conversation_history": conversation_history or [],
+            "code_index_ready": self.index_ready,
         }
 
         result = await self.graph.ainvoke(initial_state)
@@ -213,8 +416,7 @@ class ChatGraph:
         conversation_history: list[dict] | None = None,
     ) -> AsyncGenerator[str, None]:
         """Process a chat message and stream the response."""
-        if not self._initialized:
-            await self.initialize()
+        self.start()
 
         messages: list[HumanMessage | AIMessage] = []
 
@@ -232,13 +434,16 @@ class ChatGraph:
             "next_agent": "",
             "agent_output": "",
             "conversation_history": conversation_history or [],
+            "code_index_ready": self.index_ready,
         }
 
         orchestrator_result = await orchestrator_node(initial_state)
         next_agent = orchestrator_result.get("next_agent", AgentType.RESPONSE_GENERATOR.value)
 
         agent_output = ""
-        if next_agent == AgentType.REPO_INVESTIGATOR.value:
+        if next_agent == AgentType.REPO_INVESTIGATOR.value and not self.index_ready:
+            agent_output = INDEX_NOT_READY_CONTEXT
+        elif next_agent == AgentType.REPO_INVESTIGATOR.value:
             result = await repo_investigator_node(orchestrator_result)
             agent_output = result.get("agent_output", "")
         elif next_agent == AgentType.BLOG_EXPLAINER.value:
@@ -2,10 +2,13 @@
 
 from src.infrastructure.ai.mcp.github_client import GitHubClient, get_github_client
 from src.infrastructure.ai.mcp.mongodb_client import MongoDBArticleClient, get_mongodb_article_client
+from src.infrastructure.ai.mcp.repository_source import RepositorySource, get_repository_source
 
 __all__ = [
     "GitHubClient",
     "get_github_client",
+    "RepositorySource",
+    "get_repository_source",
     "MongoDBArticleClient",
     "get_mongodb_article_client",
 ]
@@ -0,0 +1,67 @@
+"""Per-host connection reuse statistics for pooled httpx clients."""
+
+from collections import Counter
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any
+
+import httpx
+
+
+@dataclass
+class HostStats:
+    """Requests sent to one host and the connections opened for them."""
+
+    requests: int = 0
+    connections: int = 0
+    tls_handshakes: int = 0
+    http_versions: Counter[str] = field(default_factory=Counter)
+
+    def to_dict(self) -> dict[str, Any]:
+        reused = max(self.requests - self.connections, 0)
+        return {
+            "requests": self.requests,
+            "connections_opened": self.connections,
+            "tls_handshakes": self.tls_handshakes,
+            "reused_connections": reused,
+            "reuse_ratio": reused / self.requests if self.requests else 0.0,
+            "http_versions": dict(self.http_versions),
+        }
+
+
+class ConnectionStats:
+    """Count requests and new connections per host through httpx event hooks.
+
+    New TCP connections and TLS handshakes are observed through the httpcore
+    ``trace`` extension, so every request that is not accounted for by one
+    of them went over a kept-alive or multiplexed HTTP/2 connection.
+    """
+
+    def __init__(self) -> None:
+        self.hosts: dict[str, HostStats] = {}
+
+    def event_hooks(self) -> dict[str, list[Any]]:
+        """Event hooks to pass to ``httpx.AsyncClient``."""
+        return {"request": [self._on_request], "response": [self._on_response]}
+
+    def get_stats(self) -> dict[str, dict[str, Any]]:
+        """Statistics per host."""
+        return {host: stats.to_dict() for host, stats in sorted(self.hosts.items())}
+
+    def _host(self, url: httpx.URL) -> HostStats:
+        return self.hosts.setdefault(url.host, HostStats())
+
+    async def _on_request(self, request: httpx.Request) -> None:
+        stats = self._host(request.url)
+        stats.requests += 1
+        request.extensions["trace"] = partial(self._on_trace, stats)
+
+    async def _on_response(self, response: httpx.Response) -> None:
+        self._host(response.request.url).http_versions[response.http_version] += 1
+
+    @staticmethod
+    async def _on_trace(stats: HostStats, event_name: str, info: dict[str, Any]) -> None:
+        if event_name == "connection.connect_tcp.complete":
+            stats.connections += 1
+        elif event_name == "connection.start_tls.complete":
+            stats.tls_handshakes += 1
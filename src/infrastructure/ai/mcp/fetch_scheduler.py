@@ -0,0 +1,236 @@
+"""Adaptive, rate-limit aware scheduling of GitHub API requests."""
+
+import asyncio
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, TypeVar
+
+import httpx
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+@dataclass
+class FetchProgress:
+    """Progress of fetching the files of one repository."""
+
+    total: int
+    done: int = 0
+    failed: int = 0
+    retries: int = 0
+    started: float = field(default_factory=time.perf_counter)
+    finished: float | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        return {
+            "total": self.total,
+            "done": self.done,
+            "failed": self.failed,
+            "retries": self.retries,
+            "seconds": elapsed,
+            "files_per_second": self.done / elapsed if elapsed else 0.0,
+            "finished": self.finished is not None,
+        }
+
+
+class FetchScheduler:
+    """Keep a sliding window of GitHub requests in flight and adapt its size.
+
+    A new request starts as soon as any other finishes, so one slow file
+    does not hold up a batch. The window grows by about one request per
+    window of fast responses and shrinks when latency climbs well above the
+    fastest seen, which means requests are queueing, and is halved when
+    GitHub throttles. Rate-limit headers from every response, passed to
+    ``observe``, pause all requests until the quota resets or for as long
+    as ``Retry-After`` asks. Throttled and failed requests are retried with
+    exponential backoff and jitter.
+    """
+
+    def __init__(
+        self,
+        initial_concurrency: int = 10,
+        max_concurrency: int = 32,
+        max_retries: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        latency_tolerance: float = 2.0,
+    ) -> None:
+        self.limit = float(max(1, min(initial_concurrency, max_concurrency)))
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.latency_tolerance = latency_tolerance
+        self.rate_limit_remaining: int | None = None
+        self.rate_limit_reset = 0.0
+        self.throttled = 0
+        self.progress: dict[str, FetchProgress] = {}
+        self._in_flight = 0
+        self._resume_at = 0.0
+        self._latency: float | None = None
+        self._min_latency: float | None = None
+        self._condition = asyncio.Condition()
+
+    async def observe(self, response: httpx.Response) -> None:
+        """Record the rate limit reported by a response (an httpx response hook)."""
+        headers = response.headers
+        if "x-ratelimit-remaining" in headers:
+            self.rate_limit_remaining = int(headers["x-ratelimit-remaining"])
+            self.rate_limit_reset = float(headers.get("x-ratelimit-reset", 0))
+            # Leave the quota to requests already in flight, then wait for the reset.
+            if self.rate_limit_remaining <= self._in_flight:
+                self._pause_until(self.rate_limit_reset)
+        if self._is_throttled(response):
+            retry_after = headers.get("retry-after")
+            if retry_after is not None and retry_after.isdigit():
+                self._pause_until(time.time() + int(retry_after))
+
+    async def wait_for_quota(self) -> None:
+        """Sleep while requests are paused by a rate limit."""
+        while (delay := self._resume_at - time.time()) > 0:
+            print(f"GitHub rate limit reached; pausing requests for {delay:.0f}s")
+            await asyncio.sleep(delay)
+
+    async def map(
+        self,
+        repo_name: str,
+        items: list[T],
+        request: Callable[[T], Awaitable[httpx.Response]],
+    ) -> AsyncIterator[tuple[T, httpx.Response | None]]:
+        """Send ``request(item)`` for every item, yielding responses as they complete.
+
+        Items whose request still fails after retrying are yielded with
+        ``None``. Progress is tracked under ``repo_name``.
+        """
+        progress = self.track(repo_name, len(items))
+        results: asyncio.Queue[tuple[T, httpx.Response | None]] = asyncio.Queue()
+        tasks: set[asyncio.Task] = set()
+
+        async def fetch(item: T) -> None:
+            try:
+                response = await self._request_with_retries(request, item, progress)
+                progress.done += 1
+            except Exception as e:
+                print(f"  Failed to fetch from {repo_name}: {type(e).__name__}: {e}")
+                response = None
+                progress.failed += 1
+            finally:
+                await self._release()
+            await results.put((item, response))
+
+        async def launch() -> None:
+            for item in items:
+                await self._acquire()
+                task = asyncio.create_task(fetch(item))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+
+        launcher = asyncio.create_task(launch())
+        try:
+            for _ in items:
+                yield await results.get()
+        finally:
+            progress.finished = time.perf_counter()
+            launcher.cancel()
+            for task in list(tasks):
+                task.cancel()
+
+    def track(self, repo_name: str, total: int) -> FetchProgress:
+        """Start tracking the progress of a repository fetched some other way."""
+        progress = self.progress[repo_name] = FetchProgress(total=total)
+        return progress
+
+    def get_stats(self) -> dict[str, Any]:
+        """Concurrency, rate limit and per-repository progress."""
+        return {
+            "concurrency": round(self.limit, 1),
+            "in_flight": self._in_flight,
+            "latency_ms": 1000 * self._latency if self._latency is not None else None,
+            "rate_limit_remaining": self.rate_limit_remaining,
+            "rate_limit_reset": self.rate_limit_reset,
+            "paused_seconds": max(0.0, self._resume_at - time.time()),
+            "throttled": self.throttled,
+            "repositories": {
+                repo_name: progress.to_dict() for repo_name, progress in self.progress.items()
+            },
+        }
+
+    async def _request_with_retries(
+        self,
+        request: Callable[[T], Awaitable[httpx.Response]],
+        item: T,
+        progress: FetchProgress,
+    ) -> httpx.Response:
+        """Send one request, holding a window slot except while backing off."""
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                response = await request(item)
+            except httpx.TransportError:
+                if attempt >= self.max_retries:
+                    raise
+                retryable = True
+            else:
+                retryable = response.status_code in RETRYABLE_STATUS_CODES or (
+                    self._is_throttled(response)
+                )
+                if not retryable or attempt >= self.max_retries:
+                    if not retryable:
+                        self._on_success(time.perf_counter() - started)
+                    return response
+                if self._is_throttled(response):
+                    self._on_throttled()
+
+            delay = min(self.max_delay, self.base_delay * 2**attempt)
+            delay *= random.uniform(0.5, 1.5)
+            attempt += 1
+            progress.retries += 1
+            await self._release()
+            try:
+                await asyncio.sleep(delay)
+            finally:
+                await self._acquire()
+
+    @staticmethod
+    def _is_throttled(response: httpx.Response) -> bool:
+        """Primary or secondary rate limit responses (403 or 429)."""
+        if response.status_code == 429:
+            return True
+        return response.status_code == 403 and (
+            "retry-after" in response.headers
+            or response.headers.get("x-ratelimit-remaining") == "0"
+        )
+
+    def _on_success(self, latency: float) -> None:
+        self._latency = latency if self._latency is None else 0.8 * self._latency + 0.2 * latency
+        self._min_latency = min(self._min_latency or latency, latency)
+        if self._latency > self.latency_tolerance * self._min_latency:
+            self.limit = max(1.0, self.limit - 1 / self.limit)
+        else:
+            self.limit = min(float(self.max_concurrency), self.limit + 1 / self.limit)
+
+    def _on_throttled(self) -> None:
+        self.throttled += 1
+        self.limit = max(1.0, self.limit / 2)
+
+    def _pause_until(self, resume_at: float) -> None:
+        self._resume_at = max(self._resume_at, resume_at)
+
+    async def _acquire(self) -> None:
+        while True:
+            await self.wait_for_quota()
+            async with self._condition:
+                await self._condition.wait_for(lambda: self._in_flight < int(self.limit))
+                if self._resume_at <= time.time():
+                    self._in_flight += 1
+                    return
+
+    async def _release(self) -> None:
+        async with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
@@ -1,80 +1,102 @@
 """GitHub MCP client for repository access."""
 
-import asyncio
 import base64
-from typing import Any
+import time
+from typing import Any, AsyncIterator
 
 import httpx
 
+from src.infrastructure.ai.mcp.connection_stats import ConnectionStats
+from src.infrastructure.ai.mcp.fetch_scheduler import FetchScheduler
+from src.infrastructure.ai.mcp.repository_source import RepositorySource
+from src.infrastructure.ai.mcp.tarball import iter_tar_files
 from src.infrastructure.config.settings import get_settings
+from src.infrastructure.external.http_cache import cached_transport, get_http_cache
 
+try:
+    import h2  # noqa: F401  # enables HTTP/2 in httpx
+except ImportError:  # pragma: no cover - optional dependency
+    h2 = None
 
-class GitHubClient:
-    """Client for interacting with GitHub API to fetch repository data."""
-
-    SUPPORTED_EXTENSIONS = {
-        ".py",
-        ".js",
-        ".ts",
-        ".tsx",
-        ".jsx",
-        ".java",
-        ".go",
-        ".rs",
-        ".cpp",
-        ".c",
-        ".h",
-        ".hpp",
-        ".cs",
-        ".rb",
-        ".php",
-        ".swift",
-        ".kt",
-        ".scala",
-        ".md",
-        ".txt",
-        ".json",
-        ".yaml",
-        ".yml",
-        ".toml",
-        ".xml",
-        ".html",
-        ".css",
-        ".scss",
-        ".sql",
-        ".sh",
-        ".bash",
-        ".dockerfile",
-        ".env.example",
-    }
-
-    IGNORED_DIRS = {
-        "node_modules",
-        "__pycache__",
-        ".git",
-        ".venv",
-        "venv",
-        "env",
-        ".env",
-        "dist",
-        "build",
-        ".next",
-        ".nuxt",
-        "target",
-        "vendor",
-        ".idea",
-        ".vscode",
-        "coverage",
-        ".pytest_cache",
-        ".mypy_cache",
-        ".ruff_cache",
-    }
+
+class GitHubClient(RepositorySource):
+    """Client for interacting with GitHub API to fetch repository data.
+
+    All requests share one pooled ``httpx.AsyncClient`` that keeps
+    connections alive and, when ``h2`` is installed, multiplexes them over
+    HTTP/2, so indexing thousands of files does not pay a TCP and TLS
+    handshake per file. The app lifespan opens and closes it.
+    """
+
+    FETCH_MODES = ("auto", "contents", "tarball")
+
+    # In "auto" mode, fetching at least this many files downloads the
+    # repository tarball instead of one contents request per file.
+    TARBALL_MIN_FILES = 20
 
     def __init__(self) -> None:
         settings = get_settings()
         self.token = settings.github_token
         self.username = settings.github_username
         self.base_url = "https://api.github.com"
+        if settings.github_fetch_mode not in self.FETCH_MODES:
+            raise ValueError(
+                f"Unknown GitHub fetch mode {settings.github_fetch_mode!r}, "
+                f"expected one of {', '.join(self.FETCH_MODES)}"
+            )
+        self.fetch_mode = settings.github_fetch_mode
+        self.http2 = settings.github_http2 and h2 is not None
+        self.limits = httpx.Limits(
+            max_connections=settings.github_max_connections,
+            max_keepalive_connections=settings.github_max_keepalive_connections,
+            keepalive_expiry=settings.github_keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(
+            settings.github_read_timeout, connect=settings.github_connect_timeout
+        )
+        self.connection_stats = ConnectionStats()
+        self.fetch_scheduler = FetchScheduler(
+            initial_concurrency=settings.github_fetch_concurrency,
+            max_concurrency=settings.github_fetch_max_concurrency,
+            max_retries=settings.github_fetch_max_retries,
+        )
+        self._client: httpx.AsyncClient | None = None
+
+    def open(self) -> None:
+        """Create the pooled HTTP client."""
+        if self._client is None:
+            event_hooks = self.connection_stats.event_hooks()
+            event_hooks["response"].append(self.fetch_scheduler.observe)
+            self._client = httpx.AsyncClient(
+                headers=self._get_headers(),
+                transport=cached_transport(http2=self.http2, limits=self.limits),
+                timeout=self.timeout,
+                event_hooks=event_hooks,
+            )
+
+    async def close(self) -> None:
+        """Close the pooled HTTP client and its connections."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Get the pooled HTTP client, opening it on first use outside the app."""
+        self.open()
+        return self._client
+
+    def get_connection_stats(self) -> dict[str, dict[str, Any]]:
+        """Connection reuse statistics per host."""
+        return self.connection_stats.get_stats()
+
+    def get_fetch_stats(self) -> dict[str, Any]:
+        """Fetch concurrency, rate limit and per-repository progress."""
+        return self.fetch_scheduler.get_stats()
+
+    def get_cache_stats(self) -> dict[str, int]:
+        """Response cache statistics, empty if the cache is disabled."""
+        cache = get_http_cache()
+        return cache.stats() if cache is not None else {}
 
     def _get_headers(self) -> dict[str, str]:
         """Get headers for GitHub API requests."""
@@ -87,151 +109,209 @@ class GitHubClient:
         return headers
 
     async def get_repositories(self) -> list[dict[str, Any]]:
-        """Fetch all public repositories for the configured user."""
+        """Fetch all public repositories for the configured user.
+
+        Follows the ``Link: rel="next"`` pages of the listing. If any page
+        fails, nothing is returned rather than a partial list, since callers
+        drop indexed repositories that are missing from it.
+        """
         if not self.username:
             return []
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.base_url}/users/{self.username}/repos",
-                headers=self._get_headers(),
-                params={
-                    "type": "public",
-                    "sort": "updated",
-                    "per_page": 100,
-                },
-            )
+        repos: list[dict[str, Any]] = []
+        url: str | None = f"{self.base_url}/users/{self.username}/repos"
+        params: dict[str, Any] | None = {
+            "type": "public",
+            "sort": "updated",
+            "per_page": 100,
+        }
+        while url:
+            response = await self._get_client().get(url, params=params)
 
             if response.status_code != 200:
                 print(f"Failed to fetch repositories: {response.status_code}")
                 return []
 
-            repos = response.json()
-            return [
-                {
-                    "name": repo["name"],
-                    "full_name": repo["full_name"],
-                    "description": repo["description"],
-                    "html_url": repo["html_url"],
-                    "language": repo["language"],
-                    "default_branch": repo["default_branch"],
-                    "topics": repo.get("topics", []),
-                }
-                for repo in repos
-                if not repo["fork"]
-            ]
+            repos.extend(response.json())
+            # The next page URL already carries the query parameters.
+            url, params = response.links.get("next", {}).get("url"), None
+
+        return [
+            {
+                "name": repo["name"],
+                "full_name": repo["full_name"],
+                "description": repo["description"],
+                "html_url": repo["html_url"],
+                "language": repo["language"],
+                "default_branch": repo["default_branch"],
+                "topics": repo.get("topics", []),
+            }
+            for repo in repos
+            if not repo["fork"]
+        ]
 
     async def get_repository_tree(
         self, repo_name: str, branch: str = "main"
     ) -> list[dict[str, Any]]:
-        """Fetch the file tree for a repository."""
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.base_url}/repos/{self.username}/{repo_name}/git/trees/{branch}",
-                headers=self._get_headers(),
-                params={"recursive": "1"},
+        """Fetch the file tree for a repository at the head of a branch.
+
+        The branch is resolved to a commit first and the tree is listed at
+        that commit, which every entry carries as ``"commit"``, so contents
+        are later fetched from the same snapshot even if the branch moved.
+        """
+        repo_url = f"{self.base_url}/repos/{self.username}/{repo_name}"
+        response = await self._get_client().get(f"{repo_url}/branches/{branch}")
+        if response.status_code == 200:
+            commit = response.json()["commit"]["sha"]
+            response = await self._get_client().get(
+                f"{repo_url}/git/trees/{commit}", params={"recursive": "1"}
             )
 
-            if response.status_code != 200:
-                if branch == "main":
-                    return await self.get_repository_tree(repo_name, "master")
-                print(f"Failed to fetch tree for {repo_name}: {response.status_code}")
-                return []
-
-            data = response.json()
-            return [
-                item
-                for item in data.get("tree", [])
-                if item["type"] == "blob" and self._should_index_file(item["path"])
-            ]
-
-    async def get_file_content(self, repo_name: str, file_path: str) -> str | None:
-        """Fetch the content of a specific file."""
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.base_url}/repos/{self.username}/{repo_name}/contents/{file_path}",
-                headers=self._get_headers(),
-            )
-
-            if response.status_code != 200:
-                return None
-
-            data = response.json()
-            if data.get("encoding") == "base64":
-                try:
-                    content = base64.b64decode(data["content"]).decode("utf-8")
-                    return content
-                except (UnicodeDecodeError, ValueError):
-                    return None
-
-            return None
-
-    async def index_repository(
-        self, repo_name: str, branch: str = "main"
-    ) -> list[dict[str, Any]]:
-        """Index all code files in a repository."""
-        tree = await self.get_repository_tree(repo_name, branch)
-
-        if not tree:
+        if response.status_code != 200:
+            if branch == "main":
+                return await self.get_repository_tree(repo_name, "master")
+            if response.status_code >= 500 or response.status_code in (403, 429):
+                # Transient or rate limited: let the caller retry the repository.
+                response.raise_for_status()
+            print(f"Failed to fetch tree for {repo_name}: {response.status_code}")
             return []
 
-        indexed_files: list[dict[str, Any]] = []
-
-        batch_size = 10
-        for i in range(0, len(tree), batch_size):
-            batch = tree[i : i + batch_size]
-            tasks = [self.get_file_content(repo_name, item["path"]) for item in batch]
-            contents = await asyncio.gather(*tasks)
-
-            for item, content in zip(batch, contents):
-                if content is None:
-                    continue
-
-                if len(content) > 50000:
-                    continue
-
-                path_parts = item["path"].rsplit("/", 1)
-                folder_path = path_parts[0] if len(path_parts) > 1 else ""
-                file_name = path_parts[-1]
-                file_ext = "." + file_name.rsplit(".", 1)[-1] if "." in file_name else ""
-
-                indexed_files.append(
-                    {
-                        "content": content,
-                        "project_name": repo_name,
-                        "folder_path": folder_path,
-                        "file_name": file_name,
-                        "file_type": file_ext,
-                        "file_url": f"https://github.com/{self.username}/{repo_name}/blob/{branch}/{item['path']}",
-                    }
-                )
-
-        return indexed_files
-
-    def _should_index_file(self, path: str) -> bool:
-        """Check if a file should be indexed based on path and extension."""
-        path_lower = path.lower()
-
-        for ignored in self.IGNORED_DIRS:
-            if f"/{ignored}/" in f"/{path_lower}/":
+        data = response.json()
+        return [
+            {**item, "commit": commit}
+            for item in data.get("tree", [])
+            if item["type"] == "blob" and self._should_index_file(item["path"])
+        ]
+
+    async def stream_files(
+        self, repo_name: str, tree: list[dict[str, Any]], branch: str = "main"
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Yield the given tree entries of a repository as described files.
+
+        Small sets of files are fetched through the contents API; larger
+        ones, or all of them with ``GITHUB_FETCH_MODE=tarball``, are read
+        from the repository tarball in a single download. Both are read at
+        the commit the tree was listed at, so contents match the blob SHAs.
+        """
+        use_tarball = self.fetch_mode == "tarball" or (
+            self.fetch_mode == "auto" and len(tree) >= self.TARBALL_MIN_FILES
+        )
+        if use_tarball:
+            shas = {item["path"]: item.get("sha", "") for item in tree}
+            commit = tree[0].get("commit") if tree else None
+            async for indexed_file in self.stream_tarball(repo_name, branch, shas, commit):
+                yield indexed_file
+        else:
+            async for indexed_file in self.iter_contents(repo_name, tree, branch):
+                yield indexed_file
+
+    async def stream_tarball(
+        self,
+        repo_name: str,
+        branch: str = "main",
+        shas: dict[str, str] | None = None,
+        commit: str | None = None,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Yield the indexable files of a branch from its streamed tarball.
+
+        The archive is decompressed while it downloads and only one file is
+        held in memory at a time. Files are filtered by path and size before
+        their data is read; with ``shas``, only those paths are yielded and
+        carry the given blob SHAs, otherwise the git blob SHA is computed
+        from the content. With ``commit``, the tarball of that commit is
+        downloaded instead of the branch head.
+        """
+
+        oversized: list[str] = []
+
+        def wanted(path: str, size: int) -> bool:
+            if not self._should_index_file(path) or (shas is not None and path not in shas):
                 return False
+            # UTF-8 needs at most 4 bytes per character.
+            if size > 4 * self.MAX_FILE_SIZE:
+                oversized.append(path)
+                return False
+            return True
 
-        if path_lower.endswith("package-lock.json"):
-            return False
-        if path_lower.endswith("yarn.lock"):
-            return False
-        if path_lower.endswith("poetry.lock"):
-            return False
-        if path_lower.endswith("uv.lock"):
-            return False
-
-        file_name = path.rsplit("/", 1)[-1].lower()
+        await self.fetch_scheduler.wait_for_quota()
+        progress = self.fetch_scheduler.track(repo_name, len(shas) if shas is not None else 0)
+        async with self._get_client().stream(
+            "GET",
+            f"{self.base_url}/repos/{self.username}/{repo_name}/tarball/{commit or branch}",
+            follow_redirects=True,
+        ) as response:
+            if response.status_code != 200:
+                if response.status_code == 404 and commit is None and branch == "main":
+                    async for indexed_file in self.stream_tarball(repo_name, "master", shas):
+                        yield indexed_file
+                    return
+                print(f"Failed to download tarball for {repo_name}: {response.status_code}")
+                return
+
+            # Paths inside GitHub tarballs start with an "owner-repo-commit/" folder.
+            async for path, data in iter_tar_files(
+                response.aiter_raw(), wanted, strip_components=1
+            ):
+                try:
+                    content = data.decode("utf-8")
+                except UnicodeDecodeError:
+                    content = ""
+                if len(content) > self.MAX_FILE_SIZE:
+                    content = ""
+                sha = shas[path] if shas is not None else self._blob_sha(data)
+                progress.done += 1
+                yield self._describe_file(repo_name, path, content, branch, sha)
+
+        # Without the data there is no SHA to compute, so these are only
+        # reported when the tree listed them.
+        if shas is not None:
+            for path in oversized:
+                progress.done += 1
+                yield self._describe_file(repo_name, path, "", branch, shas[path])
+        progress.finished = time.perf_counter()
+
+    async def iter_contents(
+        self, repo_name: str, tree: list[dict[str, Any]], branch: str = "main"
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Yield described files from the contents API as their requests complete.
+
+        Requests go through the fetch scheduler, which keeps a window of
+        them in flight sized to latency and the rate limit.
+        """
+        async for item, response in self.fetch_scheduler.map(
+            repo_name,
+            tree,
+            lambda item: self._request_file(repo_name, item["path"], item.get("commit")),
+        ):
+            if response is None or response.status_code != 200:
+                continue
+            content = self._decode_content(response)
+            if content is None or len(content) > self.MAX_FILE_SIZE:
+                content = ""
+            yield self._describe_file(repo_name, item["path"], content, branch, item.get("sha", ""))
+
+    async def _request_file(
+        self, repo_name: str, file_path: str, commit: str | None = None
+    ) -> httpx.Response:
+        return await self._get_client().get(
+            f"{self.base_url}/repos/{self.username}/{repo_name}/contents/{file_path}",
+            params={"ref": commit} if commit else None,
+        )
+
+    @staticmethod
+    def _decode_content(response: httpx.Response) -> str | None:
+        """Decode a successful contents API response, or None for binary files."""
+        data = response.json()
+        if data.get("encoding") == "base64":
+            try:
+                return base64.b64decode(data["content"]).decode("utf-8")
+            except (UnicodeDecodeError, ValueError):
+                return None
 
-        if file_name == "dockerfile":
-            return True
+        return None
 
-        ext = "." + file_name.rsplit(".", 1)[-1] if "." in file_name else ""
-        return ext in self.SUPPORTED_EXTENSIONS
+    def _file_url(self, repo_name: str, path: str, branch: str) -> str:
+        return f"https://github.com/{self.username}/{repo_name}/blob/{branch}/{path}"
 
 
 _github_client: GitHubClient | None = None
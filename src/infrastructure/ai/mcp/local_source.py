@@ -0,0 +1,247 @@
+"""Index repositories from git checkouts and bare mirrors on local disk.
+
+Every directory under ``LOCAL_REPOSITORIES_PATH`` is one repository: a bare
+mirror (``git clone --mirror``) is read at a branch through ``git ls-tree``
+and ``git cat-file``, and any other directory, usually a checkout, is read
+from its working tree. No network is used, so ingestion can be timed on
+its own::
+
+    python -m src.infrastructure.ai.mcp.local_source [path]
+"""
+
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, AsyncIterator
+
+from src.infrastructure.ai.mcp.repository_source import RepositorySource
+from src.infrastructure.config.settings import get_settings
+
+
+class LocalRepositorySource(RepositorySource):
+    """Repository source reading a directory of git checkouts or bare mirrors."""
+
+    def __init__(self, root: str | Path | None = None) -> None:
+        settings = get_settings()
+        self.root = Path(root or settings.local_repositories_path)
+        self.username = settings.github_username
+
+    async def get_repositories(self) -> list[dict[str, Any]]:
+        """List the repositories under the root directory."""
+        repos = []
+        for name, path in (await asyncio.to_thread(self._scan)).items():
+            branch = None
+            if self._is_bare(path) or (path / ".git").exists():
+                branch = await self._git(path, "symbolic-ref", "--short", "HEAD")
+            repos.append(
+                {
+                    "name": name,
+                    "full_name": f"{self.username}/{name}" if self.username else name,
+                    "description": None,
+                    "html_url": self._repo_url(name, path),
+                    "language": None,
+                    "default_branch": branch.decode().strip() if branch else "main",
+                    "topics": [],
+                }
+            )
+        return repos
+
+    async def get_repository_tree(
+        self, repo_name: str, branch: str = "main"
+    ) -> list[dict[str, Any]]:
+        """List the indexable files of a repository.
+
+        Bare mirrors are listed at ``branch``, falling back to ``HEAD`` if it
+        does not exist; checkouts are listed from the working tree as is.
+        """
+        path = self._repo_path(repo_name)
+        if path is None:
+            return []
+        if not self._is_bare(path):
+            return await asyncio.to_thread(self._walk, path)
+
+        listing = await self._git(path, "ls-tree", "-r", "-z", "--full-tree", branch)
+        if listing is None:
+            listing = await self._git(path, "ls-tree", "-r", "-z", "--full-tree", "HEAD")
+        if listing is None:
+            print(f"Failed to list tree for {repo_name}")
+            return []
+
+        tree = []
+        for entry in listing.decode("utf-8", "surrogateescape").split("\0"):
+            if not entry:
+                continue
+            info, file_path = entry.split("\t", 1)
+            mode, kind, sha = info.split()
+            # Skip symlinks (120000) and submodules, which are not blobs.
+            if kind == "blob" and mode != "120000" and self._should_index_file(file_path):
+                tree.append({"path": file_path, "mode": mode, "type": kind, "sha": sha})
+        return tree
+
+    async def stream_files(
+        self, repo_name: str, tree: list[dict[str, Any]], branch: str = "main"
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Yield the given tree entries of a repository as described files."""
+        path = self._repo_path(repo_name)
+        if path is None or not tree:
+            return
+
+        if self._is_bare(path):
+            blobs = self._cat_blobs(path, [item["sha"] for item in tree])
+        else:
+            blobs = self._read_files(path, [item["path"] for item in tree])
+
+        items = iter(tree)
+        async for data in blobs:
+            item = next(items)
+            if data is None:
+                continue
+            try:
+                content = data.decode("utf-8") if len(data) <= 4 * self.MAX_FILE_SIZE else ""
+            except UnicodeDecodeError:
+                content = ""
+            if len(content) > self.MAX_FILE_SIZE:
+                content = ""
+            yield self._describe_file(repo_name, item["path"], content, branch, item["sha"])
+
+    def _scan(self) -> dict[str, Path]:
+        """Map repository names to their directories."""
+        if not self.root.is_dir():
+            print(f"Local repositories directory not found: {self.root}")
+            return {}
+        return {
+            path.name.removesuffix(".git"): path
+            for path in sorted(self.root.iterdir())
+            if path.is_dir() and not path.name.startswith(".")
+        }
+
+    def _repo_path(self, repo_name: str) -> Path | None:
+        for path in (self.root / repo_name, self.root / f"{repo_name}.git"):
+            if path.is_dir():
+                return path
+        return None
+
+    @staticmethod
+    def _is_bare(path: Path) -> bool:
+        return (path / "HEAD").is_file() and (path / "objects").is_dir()
+
+    def _walk(self, root: Path) -> list[dict[str, Any]]:
+        """List the indexable files of a working tree with their blob SHAs."""
+        tree = []
+        for directory, dir_names, file_names in os.walk(root):
+            dir_names[:] = sorted(d for d in dir_names if d.lower() not in self.IGNORED_DIRS)
+            for file_name in sorted(file_names):
+                file_path = Path(directory, file_name)
+                relative = file_path.relative_to(root).as_posix()
+                if file_path.is_symlink() or not self._should_index_file(relative):
+                    continue
+                try:
+                    data = file_path.read_bytes()
+                except OSError:
+                    continue
+                tree.append({"path": relative, "type": "blob", "sha": self._blob_sha(data)})
+        return tree
+
+    @staticmethod
+    async def _read_files(root: Path, paths: list[str]) -> AsyncIterator[bytes | None]:
+        def read(file_path: str) -> bytes | None:
+            try:
+                return (root / file_path).read_bytes()
+            except OSError:
+                return None
+
+        for file_path in paths:
+            yield await asyncio.to_thread(read, file_path)
+
+    @staticmethod
+    async def _cat_blobs(path: Path, shas: list[str]) -> AsyncIterator[bytes | None]:
+        """Read blobs from a bare repository through one ``git cat-file --batch``."""
+        process = await asyncio.create_subprocess_exec(
+            "git",
+            "-C",
+            str(path),
+            "cat-file",
+            "--batch",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+        )
+
+        async def feed() -> None:
+            # Written concurrently with reading, so a full stdout pipe
+            # cannot block git while stdin is still being filled.
+            for sha in shas:
+                process.stdin.write(f"{sha}\n".encode())
+                await process.stdin.drain()
+            process.stdin.close()
+
+        feeder = asyncio.create_task(feed())
+        try:
+            for _ in shas:
+                header = (await process.stdout.readline()).split()
+                if len(header) < 3 or header[1] != b"blob":
+                    yield None
+                    continue
+                data = await process.stdout.readexactly(int(header[2]) + 1)
+                yield data[:-1]
+            await feeder
+        finally:
+            feeder.cancel()
+            if process.returncode is None:
+                process.kill()
+            await process.wait()
+
+    @staticmethod
+    async def _git(path: Path, *args: str) -> bytes | None:
+        """Run a git command in ``path`` and return its output, or None on failure."""
+        process = await asyncio.create_subprocess_exec(
+            "git",
+            "-C",
+            str(path),
+            *args,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        stdout, _ = await process.communicate()
+        return stdout if process.returncode == 0 else None
+
+    def _repo_url(self, repo_name: str, path: Path) -> str:
+        if self.username:
+            return f"https://github.com/{self.username}/{repo_name}"
+        return path.resolve().as_uri()
+
+    def _file_url(self, repo_name: str, path: str, branch: str) -> str:
+        """GitHub links for mirrors of the configured user's repositories, else file URIs."""
+        if self.username:
+            return f"https://github.com/{self.username}/{repo_name}/blob/{branch}/{path}"
+        repo_path = self._repo_path(repo_name) or self.root / repo_name
+        return (repo_path.resolve() / path).as_uri()
+
+
+async def main(root: str | None = None) -> None:
+    source = LocalRepositorySource(root)
+    total_files = total_bytes = 0
+    started = time.perf_counter()
+    for repo in await source.get_repositories():
+        repo_started = time.perf_counter()
+        tree = await source.get_repository_tree(repo["name"], repo["default_branch"])
+        files = num_bytes = 0
+        async for indexed_file in source.stream_files(repo["name"], tree, repo["default_branch"]):
+            files += 1
+            num_bytes += len(indexed_file["content"].encode())
+        seconds = time.perf_counter() - repo_started
+        print(f"{repo['name']}: {files} files, {num_bytes / 1e6:.2f} MB in {seconds:.2f}s")
+        total_files += files
+        total_bytes += num_bytes
+
+    seconds = time.perf_counter() - started
+    print(
+        f"Total: {total_files} files, {total_bytes / 1e6:.2f} MB in {seconds:.2f}s "
+        f"({total_files / max(seconds, 1e-9):.0f} files/s, "
+        f"{total_bytes / 1e6 / max(seconds, 1e-9):.1f} MB/s)"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1] if len(sys.argv) > 1 else None))
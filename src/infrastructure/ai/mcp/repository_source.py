@@ -0,0 +1,177 @@
+"""Common interface and file rules for sources of repositories to index."""
+
+import hashlib
+from typing import Any, AsyncIterator
+
+from src.infrastructure.config.settings import get_settings
+
+REPOSITORY_SOURCES = ("github", "local")
+
+
+class RepositorySource:
+    """A place repositories are indexed from.
+
+    Subclasses list repositories and their indexable files and yield file
+    records in the shape ``CodeDocument.from_file`` expects, using the same
+    rules for which files are indexed.
+    """
+
+    SUPPORTED_EXTENSIONS = {
+        ".py",
+        ".js",
+        ".ts",
+        ".tsx",
+        ".jsx",
+        ".java",
+        ".go",
+        ".rs",
+        ".cpp",
+        ".c",
+        ".h",
+        ".hpp",
+        ".cs",
+        ".rb",
+        ".php",
+        ".swift",
+        ".kt",
+        ".scala",
+        ".md",
+        ".txt",
+        ".json",
+        ".yaml",
+        ".yml",
+        ".toml",
+        ".xml",
+        ".html",
+        ".css",
+        ".scss",
+        ".sql",
+        ".sh",
+        ".bash",
+        ".dockerfile",
+        ".env.example",
+    }
+
+    IGNORED_DIRS = {
+        "node_modules",
+        "__pycache__",
+        ".git",
+        ".venv",
+        "venv",
+        "env",
+        ".env",
+        "dist",
+        "build",
+        ".next",
+        ".nuxt",
+        "target",
+        "vendor",
+        ".idea",
+        ".vscode",
+        "coverage",
+        ".pytest_cache",
+        ".mypy_cache",
+        ".ruff_cache",
+    }
+
+    # Files longer than this many characters are not indexed.
+    MAX_FILE_SIZE = 50000
+
+    async def get_repositories(self) -> list[dict[str, Any]]:
+        """List the repositories to index."""
+        raise NotImplementedError
+
+    async def get_repository_tree(
+        self, repo_name: str, branch: str = "main"
+    ) -> list[dict[str, Any]]:
+        """List the indexable files of a repository with their git blob SHAs."""
+        raise NotImplementedError
+
+    def stream_files(
+        self, repo_name: str, tree: list[dict[str, Any]], branch: str = "main"
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Yield the given tree entries of a repository as described files.
+
+        Files that are not indexed because they are binary or longer than
+        ``MAX_FILE_SIZE`` are yielded with empty content, so their SHAs are
+        recorded and they are not fetched again until they change. Files
+        that could not be fetched are left out and retried on the next run.
+        """
+        raise NotImplementedError
+
+    def _file_url(self, repo_name: str, path: str, branch: str) -> str:
+        """Link to a file, shown with search results."""
+        raise NotImplementedError
+
+    def _describe_file(
+        self, repo_name: str, path: str, content: str, branch: str, blob_sha: str
+    ) -> dict[str, Any]:
+        """Build the file record passed to the indexing pipeline."""
+        path_parts = path.rsplit("/", 1)
+        folder_path = path_parts[0] if len(path_parts) > 1 else ""
+        file_name = path_parts[-1]
+        file_ext = "." + file_name.rsplit(".", 1)[-1] if "." in file_name else ""
+
+        return {
+            "content": content,
+            "project_name": repo_name,
+            "folder_path": folder_path,
+            "file_name": file_name,
+            "file_type": file_ext,
+            "file_url": self._file_url(repo_name, path, branch),
+            "blob_sha": blob_sha,
+        }
+
+    @staticmethod
+    def _blob_sha(data: bytes) -> str:
+        """The git blob SHA of file content, as listed in repository trees."""
+        return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+    def _should_index_file(self, path: str) -> bool:
+        """Check if a file should be indexed based on path and extension."""
+        path_lower = path.lower()
+
+        for ignored in self.IGNORED_DIRS:
+            if f"/{ignored}/" in f"/{path_lower}/":
+                return False
+
+        if path_lower.endswith("package-lock.json"):
+            return False
+        if path_lower.endswith("yarn.lock"):
+            return False
+        if path_lower.endswith("poetry.lock"):
+            return False
+        if path_lower.endswith("uv.lock"):
+            return False
+
+        file_name = path.rsplit("/", 1)[-1].lower()
+
+        if file_name == "dockerfile":
+            return True
+
+        ext = "." + file_name.rsplit(".", 1)[-1] if "." in file_name else ""
+        return ext in self.SUPPORTED_EXTENSIONS
+
+
+_repository_source: RepositorySource | None = None
+
+
+def get_repository_source() -> RepositorySource:
+    """Get the repository source selected by ``REPOSITORY_SOURCE``."""
+    global _repository_source
+    if _repository_source is None:
+        source = get_settings().repository_source
+        if source == "github":
+            from src.infrastructure.ai.mcp.github_client import get_github_client
+
+            _repository_source = get_github_client()
+        elif source == "local":
+            from src.infrastructure.ai.mcp.local_source import LocalRepositorySource
+
+            _repository_source = LocalRepositorySource()
+        else:
+            raise ValueError(
+                f"Unknown repository source {source!r}, "
+                f"expected one of {', '.join(REPOSITORY_SOURCES)}"
+            )
+    return _repository_source
@@ -0,0 +1,98 @@
+"""Streaming reader for gzipped tar archives such as GitHub repository tarballs."""
+
+import tarfile
+import zlib
+from typing import AsyncIterable, AsyncIterator, Callable
+
+BLOCK_SIZE = tarfile.BLOCKSIZE
+
+
+def _parse_pax(data: bytes) -> dict[str, str]:
+    """Parse the ``length key=value`` records of a pax extended header."""
+    records: dict[str, str] = {}
+    pos = 0
+    while pos < len(data):
+        space = data.find(b" ", pos)
+        if space == -1:
+            break
+        length = int(data[pos:space])
+        if length <= 0:
+            break
+        key, _, value = data[space + 1 : pos + length - 1].partition(b"=")
+        records[key.decode("utf-8", "replace")] = value.decode("utf-8", "replace")
+        pos += length
+    return records
+
+
+async def iter_tar_files(
+    chunks: AsyncIterable[bytes],
+    wanted: Callable[[str, int], bool],
+    strip_components: int = 0,
+) -> AsyncIterator[tuple[str, bytes]]:
+    """Yield ``(path, content)`` of the regular files in a ``.tar.gz`` stream.
+
+    The archive is decompressed and parsed as ``chunks`` arrive, so at most
+    one wanted file is held in memory at a time. ``wanted(path, size)``
+    decides before a file's data is read whether to keep it; the data of
+    other entries is skipped as it streams past. ``strip_components``
+    leading path components are removed, like ``tar --strip-components``.
+    """
+    decompressor = zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+    buffer = bytearray()
+    # Entry being read: remaining bytes, padding, and the buffer for its data
+    # (None while skipping it).
+    remaining = padding = 0
+    member: tarfile.TarInfo | None = None
+    data: bytearray | None = None
+    long_name: str | None = None
+    pax: dict[str, str] = {}
+
+    async for chunk in chunks:
+        buffer += decompressor.decompress(chunk)
+        while True:
+            if remaining or padding:
+                take = min(len(buffer), remaining + padding)
+                if not take:
+                    break
+                content = min(take, remaining)
+                if data is not None:
+                    data += buffer[:content]
+                del buffer[:take]
+                remaining -= content
+                padding -= take - content
+                if remaining or padding:
+                    break
+
+            if member is not None:
+                if member.type == tarfile.GNUTYPE_LONGNAME:
+                    long_name = data.rstrip(b"\0").decode("utf-8", "replace")
+                elif member.type == tarfile.XHDTYPE:
+                    pax = _parse_pax(bytes(data))
+                elif data is not None:
+                    yield member.name, bytes(data)
+                member = data = None
+
+            if len(buffer) < BLOCK_SIZE:
+                break
+            header = bytes(buffer[:BLOCK_SIZE])
+            del buffer[:BLOCK_SIZE]
+            if header == tarfile.NUL * BLOCK_SIZE:
+                continue
+            member = tarfile.TarInfo.frombuf(header, "utf-8", "surrogateescape")
+            if member.type in (tarfile.GNUTYPE_LONGNAME, tarfile.XHDTYPE, tarfile.XGLTYPE):
+                data = None if member.type == tarfile.XGLTYPE else bytearray()
+                remaining = member.size
+                padding = -member.size % BLOCK_SIZE
+                continue
+
+            name = pax.get("path") or long_name or member.name
+            member.size = int(pax.get("size", member.size))
+            long_name, pax = None, {}
+            remaining = member.size
+            padding = -member.size % BLOCK_SIZE
+            parts = name.split("/")[strip_components:]
+            member.name = "/".join(parts)
+            if member.isreg() and parts and wanted(member.name, member.size):
+                data = bytearray()
+            else:
+                data = None
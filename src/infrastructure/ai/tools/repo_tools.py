@@ -4,8 +4,14 @@ from typing import Any
 
 from langchain_core.tools import tool
 
+from src.infrastructure.ai.vectorstore.chunking import assemble_chunks
 from src.infrastructure.ai.vectorstore.faiss_store import get_vector_store
-from src.infrastructure.ai.mcp.github_client import get_github_client
+from src.infrastructure.ai.mcp.repository_source import get_repository_source
+
+
+def _span_url(result: dict[str, Any]) -> str:
+    """Link to the line range of a search result on GitHub."""
+    return f"{result['file_url']}#L{result['start_line']}-L{result['end_line']}"
 
 
 @tool
@@ -18,7 +24,8 @@ async def search_code(
     """Search for code snippets in the indexed repositories.
 
     Args:
-        query: Natural language query describing what code to find
+        query: Natural language query describing what code to find, or an
+            exact identifier, config key or error name to look up
         project_name: Optional filter by project/repository name
         file_type: Optional filter by file extension (e.g., ".py", ".ts")
         num_results: Number of results to return (default 5)
@@ -46,10 +53,11 @@ async def search_code(
         formatted_results.append(
             f"**Result {i}**\n"
             f"- Project: {result['project_name']}\n"
-            f"- File: {result['folder_path']}/{result['file_name']}\n"
+            f"- File: {result['folder_path']}/{result['file_name']} "
+            f"(lines {result['start_line']}-{result['end_line']})\n"
             f"- Type: {result['file_type']}\n"
-            f"- URL: {result['file_url']}\n"
-            f"- Relevance Score: {result['score']:.3f}\n"
+            f"- URL: {_span_url(result)}\n"
+            f"- Rank: {i} of {len(results)} by relevance\n"
             f"\n```{result['file_type'].lstrip('.')}\n{content_preview}\n```\n"
         )
 
@@ -93,30 +101,17 @@ async def get_project_files(project_name: str, file_type: str | None = None) ->
         Formatted list of files in the project
     """
     vector_store = get_vector_store()
-
-    files: list[dict[str, Any]] = []
-    for doc in vector_store.documents:
-        if doc.project_name.lower() == project_name.lower():
-            if file_type is None or doc.file_type == file_type:
-                files.append(
-                    {
-                        "path": f"{doc.folder_path}/{doc.file_name}",
-                        "type": doc.file_type,
-                    }
-                )
+    files = await vector_store.list_files(project_name, file_type)
 
     if not files:
         return f"No files found for project '{project_name}'."
 
-    unique_files = list({f["path"]: f for f in files}.values())
-    unique_files.sort(key=lambda x: x["path"])
+    formatted = [f"**Files in {project_name}** ({len(files)} files)\n"]
+    for path, path_type in files[:50]:
+        formatted.append(f"- {path} ({path_type})")
 
-    formatted = [f"**Files in {project_name}** ({len(unique_files)} files)\n"]
-    for f in unique_files[:50]:
-        formatted.append(f"- {f['path']} ({f['type']})")
-
-    if len(unique_files) > 50:
-        formatted.append(f"\n... and {len(unique_files) - 50} more files")
+    if len(files) > 50:
+        formatted.append(f"\n... and {len(files) - 50} more files")
 
     return "\n".join(formatted)
 
@@ -133,21 +128,21 @@ async def get_file_content(project_name: str, file_path: str) -> str:
         The full content of the file
     """
     vector_store = get_vector_store()
+    chunks = await vector_store.get_file_chunks(project_name, file_path)
+
+    if not chunks:
+        return f"File '{file_path}' not found in project '{project_name}'."
 
-    for doc in vector_store.documents:
-        doc_path = f"{doc.folder_path}/{doc.file_name}".lstrip("/")
-        if doc.project_name.lower() == project_name.lower() and (
-            doc_path == file_path or doc_path.endswith(file_path) or file_path.endswith(doc_path)
-        ):
-            return (
-                f"**File: {doc.file_name}**\n"
-                f"- Project: {doc.project_name}\n"
-                f"- Path: {doc.folder_path}/{doc.file_name}\n"
-                f"- URL: {doc.file_url}\n\n"
-                f"```{doc.file_type.lstrip('.')}\n{doc.content}\n```"
-            )
+    match = chunks[0]
+    content = assemble_chunks([(doc.start_line, doc.end_line, doc.content) for doc in chunks])
 
-    return f"File '{file_path}' not found in project '{project_name}'."
+    return (
+        f"**File: {match.file_name}**\n"
+        f"- Project: {match.project_name}\n"
+        f"- Path: {match.folder_path}/{match.file_name}\n"
+        f"- URL: {match.file_url}\n\n"
+        f"```{match.file_type.lstrip('.')}\n{content}\n```"
+    )
 
 
 @tool
@@ -157,8 +152,7 @@ async def get_repository_info() -> str:
     Returns:
         Formatted information about repositories including descriptions and languages
     """
-    github_client = get_github_client()
-    repos = await github_client.get_repositories()
+    repos = await get_repository_source().get_repositories()
 
     if not repos:
         return "No repositories found."
@@ -211,9 +205,10 @@ async def search_in_project(project_name: str, query: str, num_results: int = 10
 
         formatted_results.append(
             f"**Result {i}**\n"
-            f"- File: {result['folder_path']}/{result['file_name']}\n"
+            f"- File: {result['folder_path']}/{result['file_name']} "
+            f"(lines {result['start_line']}-{result['end_line']})\n"
             f"- Type: {result['file_type']}\n"
-            f"- URL: {result['file_url']}\n"
+            f"- URL: {_span_url(result)}\n"
             f"\n```{result['file_type'].lstrip('.')}\n{content_preview}\n```\n"
         )
 
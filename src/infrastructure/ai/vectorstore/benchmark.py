@@ -0,0 +1,239 @@
+"""Benchmarks for the code search index.
+
+Run against the current on-disk index with::
+
+    python -m src.infrastructure.ai.vectorstore.benchmark
+"""
+
+import asyncio
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+import faiss
+import numpy as np
+
+from src.infrastructure.ai.vectorstore.index_factory import (
+    INDEX_TYPES,
+    STORAGE_TYPES,
+    build_index,
+    build_vector_storage,
+    search_parameters,
+)
+from src.infrastructure.ai.vectorstore.offload import BlockingExecutor
+from src.infrastructure.ai.vectorstore.persistence import read_generations, read_manifest
+from src.infrastructure.config.settings import get_settings
+
+
+def sample_queries(vectors: np.ndarray, num_queries: int, seed: int = 0) -> np.ndarray:
+    """Perturbed copies of random stored vectors, normalized like real queries."""
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(len(vectors), size=min(num_queries, len(vectors)), replace=False)
+    queries = vectors[rows] + rng.normal(0, 0.05, size=(len(rows), vectors.shape[1]))
+    queries = queries.astype(np.float32)
+    faiss.normalize_L2(queries)
+    return queries
+
+
+def recall_report(
+    vectors: np.ndarray,
+    queries: np.ndarray,
+    k: int = 10,
+    index_types: tuple[str, ...] = INDEX_TYPES,
+    target_recall: float = 0.95,
+) -> list[dict[str, Any]]:
+    """Compare index types against the exact flat baseline.
+
+    For each type, reports recall@k against flat search, mean query latency,
+    build time and serialized index size.
+    """
+    baseline = faiss.IndexFlatIP(vectors.shape[1])
+    baseline.add(vectors)
+    _, expected = baseline.search(queries, k)
+
+    rows: list[dict[str, Any]] = []
+    for index_type in index_types:
+        started = time.perf_counter()
+        index = build_index(index_type, vectors)
+        build_seconds = time.perf_counter() - started
+
+        params = search_parameters(index, target_recall)
+        started = time.perf_counter()
+        for query in queries:
+            index.search(query.reshape(1, -1), k, params=params)
+        latency_ms = (time.perf_counter() - started) * 1000 / len(queries)
+
+        _, found = index.search(queries, k, params=params)
+        rows.append(
+            {
+                "index_type": index_type,
+                "recall": _recall(expected, found),
+                "latency_ms": latency_ms,
+                "build_seconds": build_seconds,
+                "memory_bytes": len(faiss.serialize_index(index)),
+            }
+        )
+    return rows
+
+
+def storage_report(
+    vectors: np.ndarray,
+    queries: np.ndarray,
+    k: int = 10,
+    storage_types: tuple[str, ...] = STORAGE_TYPES,
+    rerank_factor: int = 4,
+) -> list[dict[str, Any]]:
+    """Compare vector storage types by memory saved against recall lost.
+
+    Recall@k is measured against exact float32 search, both for the
+    compressed scores alone and after re-ranking the top
+    ``k * rerank_factor`` candidates with the original vectors.
+    """
+    baseline = faiss.IndexFlatIP(vectors.shape[1])
+    baseline.add(vectors)
+    _, expected = baseline.search(queries, k)
+    float32_bytes = len(faiss.serialize_index(baseline))
+
+    rows: list[dict[str, Any]] = []
+    for storage_type in storage_types:
+        index = build_vector_storage(storage_type, vectors)
+        memory_bytes = len(faiss.serialize_index(index))
+
+        _, found = index.search(queries, k)
+        _, candidates = index.search(queries, k * rerank_factor)
+        reranked = [
+            row[np.argsort(-(vectors[row] @ query), kind="stable")[:k]]
+            for query, row in zip(queries, candidates)
+        ]
+        rows.append(
+            {
+                "storage": storage_type,
+                "memory_bytes": memory_bytes,
+                "memory_saved": 1 - memory_bytes / float32_bytes,
+                "recall": _recall(expected, found),
+                "recall_reranked": _recall(expected, np.array(reranked)),
+            }
+        )
+    return rows
+
+
+def _recall(expected: np.ndarray, found: np.ndarray) -> float:
+    hits = sum(len(set(e) & set(f)) for e, f in zip(expected.tolist(), found.tolist()))
+    return hits / expected.size
+
+
+def loop_lag_report(
+    vectors: np.ndarray, queries: np.ndarray, k: int = 10, threads: int = 4
+) -> list[dict[str, Any]]:
+    """Measure event-loop lag while searches and an index write run.
+
+    The same workload runs once inline on the event loop and once through
+    the thread pool. A ticker coroutine that wakes every few milliseconds
+    records how late it is woken, which is the delay every other request on
+    the worker, SSE streams included, would see.
+    """
+    index = faiss.IndexFlatIP(vectors.shape[1])
+    index.add(vectors)
+
+    rows: list[dict[str, Any]] = []
+    for mode, workers in (("inline", 0), ("offloaded", threads)):
+        executor = BlockingExecutor(max_workers=workers)
+        try:
+            rows.append({"mode": mode, **asyncio.run(_loop_lag(executor, index, queries, k))})
+        finally:
+            executor.shutdown()
+    return rows
+
+
+async def _loop_lag(
+    executor: BlockingExecutor, index: faiss.Index, queries: np.ndarray, k: int
+) -> dict[str, Any]:
+    interval = 0.005
+    lags: list[float] = []
+    done = asyncio.Event()
+
+    async def ticker() -> None:
+        while not done.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(interval)
+            lags.append(time.perf_counter() - started - interval)
+
+    async def workload() -> None:
+        await asyncio.gather(
+            *(executor.run("search", index.search, query.reshape(1, -1), k) for query in queries)
+        )
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            await executor.run("write_index", faiss.write_index, index, f"{tmp_dir}/index.faiss")
+
+    tick_task = asyncio.create_task(ticker())
+    started = time.perf_counter()
+    await workload()
+    elapsed = time.perf_counter() - started
+    done.set()
+    await tick_task
+
+    lags_ms = sorted(1000 * lag for lag in lags) or [0.0]
+    return {
+        "workload_seconds": elapsed,
+        "ticks": len(lags),
+        "mean_lag_ms": statistics.fmean(lags_ms),
+        "p99_lag_ms": lags_ms[min(len(lags_ms) - 1, int(0.99 * len(lags_ms)))],
+        "max_lag_ms": lags_ms[-1],
+    }
+
+
+def load_vectors(root: Path) -> np.ndarray:
+    """Load the exact vectors of the current snapshot."""
+    generation = read_generations(root)["current"]
+    index_path = root / generation if generation else root
+    manifest = read_manifest(index_path)
+    if manifest is None:
+        raise SystemExit(f"No snapshot found in {index_path}")
+    if manifest.get("vectors_file"):
+        return np.load(index_path / manifest["vectors_file"])
+    index = faiss.read_index(str(index_path / manifest["index_file"]))
+    return index.reconstruct_n(0, index.ntotal)
+
+
+def print_table(rows: list[dict[str, Any]]) -> None:
+    """Print benchmark rows as an aligned table."""
+    columns = list(rows[0])
+    widths = [max(len(c), *(len(_format(row[c])) for row in rows)) for c in columns]
+    print("  ".join(c.ljust(w) for c, w in zip(columns, widths)))
+    for row in rows:
+        print("  ".join(_format(row[c]).ljust(w) for c, w in zip(columns, widths)))
+
+
+def _format(value: Any) -> str:
+    return f"{value:.4f}" if isinstance(value, float) else str(value)
+
+
+if __name__ == "__main__":
+    settings = get_settings()
+    vectors = load_vectors(Path(settings.faiss_index_path))
+    print(f"Recall vs. latency over {len(vectors)} vectors (k=10)")
+    print_table(
+        recall_report(
+            vectors,
+            sample_queries(vectors, 200),
+            target_recall=settings.index_target_recall,
+        )
+    )
+    print()
+    print(f"Memory vs. recall by vector storage (re-rank factor {settings.vector_rerank_factor})")
+    print_table(
+        storage_report(
+            vectors,
+            sample_queries(vectors, 200),
+            rerank_factor=max(1, settings.vector_rerank_factor),
+        )
+    )
+    print()
+    print("Event-loop lag during searches and an index write")
+    print_table(
+        loop_lag_report(
+            vectors, sample_queries(vectors, 200), threads=settings.vectorstore_threads or 4
+        )
+    )
@@ -0,0 +1,202 @@
+"""Structure-aware chunking of source files for code indexing."""
+
+import re
+from dataclasses import dataclass
+
+MAX_CHUNK_LINES = 80
+MAX_CHUNK_CHARS = 2000
+MIN_CHUNK_LINES = 20
+WINDOW_LINES = 50
+WINDOW_OVERLAP = 10
+
+PYTHON_TOP_LEVEL = re.compile(r"^(?:async\s+def|def|class)\s+\w+")
+PYTHON_NESTED = re.compile(r"^\s+(?:async\s+def|def|class)\s+\w+")
+MARKDOWN_HEADING = re.compile(r"^#{1,6}\s+\S")
+MARKDOWN_FENCE = re.compile(r"^\s*(```|~~~)")
+
+
+@dataclass
+class CodeChunk:
+    """A contiguous span of a file, with 1-based inclusive line numbers."""
+
+    content: str
+    start_line: int
+    end_line: int
+
+
+def split_lines(content: str) -> list[str]:
+    """Split text into lines at ``\\n`` only, keeping the line endings.
+
+    Unlike ``str.splitlines``, form feeds and other Unicode line boundaries
+    stay inside their line, so line numbers match git and GitHub.
+    """
+    lines = [line + "\n" for line in content.split("\n")]
+    lines[-1] = lines[-1][:-1]
+    if not lines[-1]:
+        lines.pop()
+    return lines
+
+
+def chunk_file(content: str, file_name: str) -> list[CodeChunk]:
+    """Split a file into chunks that follow its language structure.
+
+    Python files are split at ``def``/``class`` boundaries, Markdown files at
+    headings, and everything else into overlapping line windows. A single
+    line longer than ``MAX_CHUNK_CHARS``, as in minified files, is split into
+    consecutive pieces that share its line number. Together the chunks cover
+    the whole file; only whitespace-only spans are dropped.
+    """
+    lines = split_lines(content)
+    if not lines:
+        return []
+
+    file_name = file_name.lower()
+    if file_name.endswith(".py"):
+        spans = _python_spans(lines)
+    elif file_name.endswith(".md"):
+        spans = _markdown_spans(lines)
+    else:
+        spans = _window_spans(lines, 0, len(lines))
+
+    chunks: list[CodeChunk] = []
+    for start, end in spans:
+        text = "".join(lines[start:end])
+        if not text.strip():
+            continue
+        if len(text) <= MAX_CHUNK_CHARS:
+            chunks.append(CodeChunk(content=text, start_line=start + 1, end_line=end))
+            continue
+        # Only a single over-long line exceeds the limit; windows end before it.
+        # Every piece is kept, even whitespace-only ones, so the line can be
+        # joined back exactly.
+        for i in range(0, len(text), MAX_CHUNK_CHARS):
+            piece = text[i : i + MAX_CHUNK_CHARS]
+            chunks.append(CodeChunk(content=piece, start_line=start + 1, end_line=end))
+    return chunks
+
+
+def _python_spans(lines: list[str]) -> list[tuple[int, int]]:
+    """Split Python source at top-level definitions, then at nested ones."""
+    spans: list[tuple[int, int]] = []
+    for start, end in _split_at(lines, 0, len(lines), PYTHON_TOP_LEVEL):
+        if _fits(lines, start, end):
+            spans.append((start, end))
+            continue
+        for sub_start, sub_end in _split_at(lines, start, end, PYTHON_NESTED):
+            if _fits(lines, sub_start, sub_end):
+                spans.append((sub_start, sub_end))
+            else:
+                spans.extend(_window_spans(lines, sub_start, sub_end))
+    return _merge_small(lines, spans)
+
+
+def _markdown_spans(lines: list[str]) -> list[tuple[int, int]]:
+    """Split Markdown at headings that are not inside fenced code blocks."""
+    boundaries = [0]
+    in_fence = False
+    for i, line in enumerate(lines):
+        if MARKDOWN_FENCE.match(line):
+            in_fence = not in_fence
+        elif not in_fence and i > 0 and MARKDOWN_HEADING.match(line):
+            boundaries.append(i)
+    boundaries.append(len(lines))
+
+    spans: list[tuple[int, int]] = []
+    for start, end in zip(boundaries, boundaries[1:]):
+        if start == end:
+            continue
+        if _fits(lines, start, end):
+            spans.append((start, end))
+        else:
+            spans.extend(_window_spans(lines, start, end))
+    return _merge_small(lines, spans)
+
+
+def _window_spans(lines: list[str], start: int, end: int) -> list[tuple[int, int]]:
+    """Split a line range into overlapping windows bounded by lines and chars."""
+    spans: list[tuple[int, int]] = []
+    pos = start
+    while pos < end:
+        stop = pos
+        size = 0
+        while stop < end and stop - pos < WINDOW_LINES:
+            size += len(lines[stop])
+            if size > MAX_CHUNK_CHARS and stop > pos:
+                break
+            stop += 1
+        # The overlap before a long line can be cut to a window that lies
+        # within the previous one; it adds nothing.
+        if not spans or stop > spans[-1][1]:
+            spans.append((pos, stop))
+        if stop >= end:
+            break
+        # Short windows, cut by a long line, do not overlap, so the lines
+        # before a long line are not repeated window after window.
+        pos = stop - WINDOW_OVERLAP if stop - pos > WINDOW_OVERLAP else stop
+    return spans
+
+
+def _split_at(
+    lines: list[str], start: int, end: int, pattern: re.Pattern[str]
+) -> list[tuple[int, int]]:
+    """Split a line range before every line matching ``pattern``.
+
+    Decorators and comments directly above a definition stay with it.
+    """
+    boundaries = [start]
+    for i in range(start + 1, end):
+        if not pattern.match(lines[i]):
+            continue
+        boundary = i
+        while boundary - 1 > boundaries[-1] and lines[boundary - 1].lstrip().startswith(("@", "#")):
+            boundary -= 1
+        if boundary > boundaries[-1]:
+            boundaries.append(boundary)
+    boundaries.append(end)
+    return [(s, e) for s, e in zip(boundaries, boundaries[1:]) if s < e]
+
+
+def _merge_small(lines: list[str], spans: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    """Merge adjacent non-overlapping spans while they stay small."""
+    merged: list[tuple[int, int]] = []
+    for start, end in spans:
+        if merged:
+            prev_start, prev_end = merged[-1]
+            if (
+                prev_end == start
+                and end - prev_start <= MIN_CHUNK_LINES
+                and _fits(lines, prev_start, end)
+            ):
+                merged[-1] = (prev_start, end)
+                continue
+        merged.append((start, end))
+    return merged
+
+
+def _fits(lines: list[str], start: int, end: int) -> bool:
+    """Check whether a line range is small enough to be a single chunk."""
+    if end - start > MAX_CHUNK_LINES:
+        return False
+    return sum(len(line) for line in lines[start:end]) <= MAX_CHUNK_CHARS
+
+
+def assemble_chunks(chunks: list[tuple[int, int, str]]) -> str:
+    """Rebuild file content from ``(start_line, end_line, content)`` chunks.
+
+    Overlapping lines between consecutive windows are emitted only once, and
+    the pieces of a split long line, given in order, are joined back.
+    """
+    parts: list[str] = []
+    next_line = 1
+    partial = False
+    for start_line, end_line, content in sorted(chunks, key=lambda c: c[0]):
+        if partial and start_line == next_line - 1:
+            parts.append(content)
+        elif end_line < next_line:
+            continue
+        else:
+            skip = max(next_line - start_line, 0)
+            parts.append("".join(split_lines(content)[skip:]))
+        next_line = end_line + 1
+        partial = not content.endswith("\n")
+    return "".join(parts)
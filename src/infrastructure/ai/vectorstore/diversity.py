@@ -0,0 +1,36 @@
+"""Maximal Marginal Relevance re-ranking of search candidates."""
+
+import numpy as np
+
+
+def maximal_marginal_relevance(
+    relevance: np.ndarray, vectors: np.ndarray, k: int, lambda_mult: float
+) -> list[int]:
+    """Select ``k`` candidates balancing relevance against redundancy.
+
+    Each step picks the candidate maximizing
+    ``lambda_mult * relevance - (1 - lambda_mult) * max similarity to the
+    already selected ones``, so near-duplicate chunks are pushed down in
+    favour of different context. ``vectors`` are the normalized candidate
+    embeddings; the pairwise similarities are computed in one matrix product.
+    Returns candidate indices in selection order.
+    """
+    num_candidates = len(relevance)
+    if num_candidates == 0:
+        return []
+
+    similarity = vectors @ vectors.T
+    first = int(np.argmax(relevance))
+    selected = [first]
+    max_similarity = similarity[first].copy()
+    available = np.ones(num_candidates, dtype=bool)
+    available[first] = False
+
+    while len(selected) < min(k, num_candidates):
+        scores = lambda_mult * relevance - (1 - lambda_mult) * max_similarity
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        np.maximum(max_similarity, similarity[best], out=max_similarity)
+    return selected
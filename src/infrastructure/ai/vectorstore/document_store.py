@@ -0,0 +1,164 @@
+"""Memory-mapped columnar storage for indexed code documents.
+
+File layout (little-endian)::
+
+    header   magic, version, document count and section offsets
+    content  chunk contents back to back, each optionally zstd-compressed
+    strings  interned metadata strings: u32 count, u64 offsets[count + 1], utf-8 data
+    columns  one fixed-width ``DOCUMENT_DTYPE`` record per document
+
+Only the header, string table and columns are read at open time; chunk
+contents stay on disk until a document's ``content`` is accessed.
+"""
+
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+import numpy as np
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+MAGIC = b"KDOC"
+VERSION = 1
+HEADER = struct.Struct("<4sIQQQQ")
+HEADER_SIZE = 64
+
+FLAG_ZSTD = 1
+
+DOCUMENT_DTYPE = np.dtype(
+    [
+        ("project_name", "<u4"),
+        ("folder_path", "<u4"),
+        ("file_name", "<u4"),
+        ("file_type", "<u4"),
+        ("file_url", "<u4"),
+        ("blob_sha", "<u4"),
+        ("start_line", "<u4"),
+        ("end_line", "<u4"),
+        ("content_offset", "<u8"),
+        ("content_length", "<u4"),
+        ("flags", "<u4"),
+    ]
+)
+
+STRING_COLUMNS = ("project_name", "folder_path", "file_name", "file_type", "file_url", "blob_sha")
+
+
+class DocumentFile:
+    """Read-only, memory-mapped view of a ``documents.bin`` file."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, count, _, strings_offset, columns_offset = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Unsupported document store format in {path}")
+
+        self.columns = np.frombuffer(
+            self._mmap, dtype=DOCUMENT_DTYPE, count=count, offset=columns_offset
+        )
+        self.strings = self._read_strings(strings_offset)
+        self._decompressor = zstandard.ZstdDecompressor() if zstandard else None
+
+    def __len__(self) -> int:
+        return len(self.columns)
+
+    def iter_metadata(self) -> Iterator[dict[str, Any]]:
+        """Yield the metadata of every document without touching its content."""
+        strings = self.strings
+        string_columns = [self.columns[name].tolist() for name in STRING_COLUMNS]
+        start_lines = self.columns["start_line"].tolist()
+        end_lines = self.columns["end_line"].tolist()
+        for position in range(len(self.columns)):
+            data: dict[str, Any] = {
+                name: strings[column[position]]
+                for name, column in zip(STRING_COLUMNS, string_columns)
+            }
+            data["start_line"] = start_lines[position]
+            data["end_line"] = end_lines[position]
+            yield data
+
+    def content(self, position: int) -> str:
+        """Materialize the content of a single document."""
+        row = self.columns[position]
+        offset = int(row["content_offset"])
+        raw = self._mmap[offset : offset + int(row["content_length"])]
+        if row["flags"] & FLAG_ZSTD:
+            if self._decompressor is None:
+                raise RuntimeError("zstandard is required to read compressed documents")
+            raw = self._decompressor.decompress(raw)
+        return raw.decode("utf-8")
+
+    def _read_strings(self, offset: int) -> list[str]:
+        (count,) = struct.unpack_from("<I", self._mmap, offset)
+        offsets = np.frombuffer(self._mmap, dtype="<u8", count=count + 1, offset=offset + 4)
+        data_start = offset + 4 + 8 * (count + 1)
+        return [
+            self._mmap[data_start + int(start) : data_start + int(end)].decode("utf-8")
+            for start, end in zip(offsets[:-1], offsets[1:])
+        ]
+
+
+def write_document_file(path: Path, documents: Iterable[Any], compression: str = "none") -> None:
+    """Write documents to ``path`` atomically via a temporary file.
+
+    ``documents`` may be lazily loaded from the file being replaced; the old
+    mapping stays valid until the new file has been renamed into place.
+    """
+    if compression == "zstd" and zstandard is None:
+        raise RuntimeError("zstandard is required for DOCUMENT_COMPRESSION=zstd")
+    compressor = zstandard.ZstdCompressor(level=3) if compression == "zstd" else None
+
+    string_ids: dict[str, int] = {}
+    rows: list[tuple[int, ...]] = []
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+
+    with open(tmp_path, "wb") as f:
+        f.write(b"\0" * HEADER_SIZE)
+        content_offset = HEADER_SIZE
+
+        for doc in documents:
+            raw = doc.content.encode("utf-8")
+            flags = 0
+            if compressor is not None:
+                compressed = compressor.compress(raw)
+                if len(compressed) < len(raw):
+                    raw = compressed
+                    flags |= FLAG_ZSTD
+            f.write(raw)
+
+            ids = tuple(
+                string_ids.setdefault(getattr(doc, name), len(string_ids))
+                for name in STRING_COLUMNS
+            )
+            rows.append(ids + (doc.start_line, doc.end_line, content_offset, len(raw), flags))
+            content_offset += len(raw)
+
+        strings_offset = content_offset
+        encoded = [s.encode("utf-8") for s in string_ids]
+        offsets = np.zeros(len(encoded) + 1, dtype="<u8")
+        offsets[1:] = np.cumsum([len(s) for s in encoded], dtype=np.uint64)
+        f.write(struct.pack("<I", len(encoded)))
+        f.write(offsets.tobytes())
+        f.write(b"".join(encoded))
+
+        columns_offset = strings_offset + 4 + offsets.nbytes + int(offsets[-1])
+        padding = -columns_offset % 8
+        f.write(b"\0" * padding)
+        columns_offset += padding
+        f.write(np.array(rows, dtype=DOCUMENT_DTYPE).tobytes())
+
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, len(rows), HEADER_SIZE, strings_offset, columns_offset))
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.replace(tmp_path, path)
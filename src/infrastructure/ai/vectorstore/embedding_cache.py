@@ -0,0 +1,114 @@
+"""Persistent embedding cache keyed by embedding model and content hash."""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+
+def content_hash(text: str) -> bytes:
+    """SHA-256 digest of a text, used as its cache key."""
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+class EmbeddingCache:
+    """SQLite-backed cache of embedding vectors with least-recently-used eviction.
+
+    Vectors are stored once per ``(model, sha256(text))``, so identical
+    contents, e.g. vendored files shared across repositories, share a single
+    entry and are never embedded twice. Calls may come from worker threads
+    and are serialized on the single connection.
+    """
+
+    def __init__(self, path: Path, model: str, max_entries: int) -> None:
+        self.path = path
+        self.model = model
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " model TEXT NOT NULL,"
+            " hash BLOB NOT NULL,"
+            " vector BLOB NOT NULL,"
+            " last_used REAL NOT NULL,"
+            " PRIMARY KEY (model, hash))"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)"
+        )
+        self._conn.commit()
+        (self._size,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+
+    def get_many(self, keys: list[bytes]) -> dict[bytes, np.ndarray]:
+        """Look up cached vectors and mark them as recently used."""
+        with self._lock:
+            return self._get_many(keys)
+
+    def _get_many(self, keys: list[bytes]) -> dict[bytes, np.ndarray]:
+        found: dict[bytes, np.ndarray] = {}
+        unique = list(dict.fromkeys(keys))
+        for i in range(0, len(unique), 500):
+            batch = unique[i : i + 500]
+            placeholders = ",".join("?" * len(batch))
+            rows = self._conn.execute(
+                "SELECT hash, vector FROM embeddings "
+                f"WHERE model = ? AND hash IN ({placeholders})",
+                [self.model, *batch],
+            ).fetchall()
+            for key, vector in rows:
+                found[key] = np.frombuffer(vector, dtype=np.float32)
+
+        if found:
+            now = time.time()
+            self._conn.executemany(
+                "UPDATE embeddings SET last_used = ? WHERE model = ? AND hash = ?",
+                [(now, self.model, key) for key in found],
+            )
+            self._conn.commit()
+
+        self.hits += len(found)
+        self.misses += len(unique) - len(found)
+        return found
+
+    def put_many(self, items: dict[bytes, np.ndarray]) -> None:
+        """Store vectors, evicting the least recently used entries beyond the limit."""
+        if not items:
+            return
+
+        with self._lock:
+            self._put_many(items)
+
+    def _put_many(self, items: dict[bytes, np.ndarray]) -> None:
+        now = time.time()
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO embeddings (model, hash, vector, last_used) "
+            "VALUES (?, ?, ?, ?)",
+            [
+                (self.model, key, np.asarray(vector, dtype=np.float32).tobytes(), now)
+                for key, vector in items.items()
+            ],
+        )
+        (self._size,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+
+        excess = self._size - self.max_entries
+        if excess > 0:
+            cursor = self._conn.execute(
+                "DELETE FROM embeddings WHERE rowid IN "
+                "(SELECT rowid FROM embeddings ORDER BY last_used LIMIT ?)",
+                (excess,),
+            )
+            self._size -= cursor.rowcount
+        self._conn.commit()
+
+    def stats(self) -> dict[str, int]:
+        """Get cache size and hit/miss counters."""
+        return {"entries": self._size, "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,180 @@
+"""Batched, rate-limit aware scheduling of embedding requests."""
+
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable, Iterator
+
+import httpx
+
+EmbedFunction = Callable[[list[str]], Awaitable[list[list[float]]]]
+
+RATE_LIMIT_MARKERS = ("429", "resource_exhausted", "resource exhausted", "rate limit", "quota")
+# Status codes of requests rejected for the texts they carry.
+INVALID_INPUT_STATUS_CODES = {400, 413}
+# Markers of 400 responses caused by the credentials rather than the texts.
+AUTH_MARKERS = ("api key", "api_key", "permission", "unauthenticated", "credential")
+TRANSIENT_ERRORS = (ConnectionError, TimeoutError, httpx.TransportError)
+
+
+def _error_chain(error: BaseException) -> Iterator[BaseException]:
+    """An error followed by the errors it was raised from or while handling.
+
+    Providers wrap their client errors, e.g. ``GoogleGenerativeAIError``
+    raised from a google-genai ``APIError``, so the status code is often
+    only found further down the chain.
+    """
+    seen: set[int] = set()
+    current: BaseException | None = error
+    while current is not None and id(current) not in seen:
+        seen.add(id(current))
+        yield current
+        current = current.__cause__ or current.__context__
+
+
+def _status_code(error: BaseException) -> int | None:
+    """Best-effort HTTP status code of an embedding provider error."""
+    for cause in _error_chain(error):
+        for attr in ("status_code", "code"):
+            value = getattr(cause, attr, None)
+            if isinstance(value, int):
+                return value
+        response = getattr(cause, "response", None)
+        value = getattr(response, "status_code", None)
+        if isinstance(value, int):
+            return value
+    return None
+
+
+def _message(error: BaseException) -> str:
+    return " ".join(str(cause) for cause in _error_chain(error)).lower()
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Check whether an error is a rate limit, server error or network failure."""
+    status = _status_code(error)
+    if status is not None:
+        return status == 429 or 500 <= status < 600
+    if any(isinstance(cause, TRANSIENT_ERRORS) for cause in _error_chain(error)):
+        return True
+    return any(marker in _message(error) for marker in RATE_LIMIT_MARKERS)
+
+
+def is_invalid_input(error: BaseException) -> bool:
+    """Check whether an error rejects the texts sent, e.g. as oversized or malformed.
+
+    Invalid API keys are also reported as 400 by some providers; those,
+    like every other error, concern the whole request and are not blamed
+    on the texts.
+    """
+    if _status_code(error) not in INVALID_INPUT_STATUS_CODES:
+        return False
+    message = _message(error)
+    return not any(marker in message for marker in AUTH_MARKERS)
+
+
+async def _gather(*coroutines: Awaitable[list[list[float] | None]]) -> list:
+    """Like ``asyncio.gather``, but cancel the other batches once one fails."""
+    tasks = [asyncio.ensure_future(coroutine) for coroutine in coroutines]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+
+class EmbeddingScheduler:
+    """Split texts into provider-sized batches and embed them concurrently.
+
+    At most ``max_concurrency`` batches are in flight. Rate-limit, server and
+    network errors are retried with exponential backoff and jitter. A batch
+    rejected for its input is split in half until the text that cannot be
+    embedded, such as an oversized or malformed one, is isolated. Its vector
+    is returned as ``None`` and counted in ``failed_texts``, so it only fails
+    itself instead of the whole repository. Any other error, such as an
+    invalid key or unknown model, is raised, as is a batch in which no text
+    could be embedded, so callers keep their existing data.
+    """
+
+    def __init__(
+        self,
+        embed: EmbedFunction,
+        batch_size: int = 100,
+        max_concurrency: int = 4,
+        max_retries: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+    ) -> None:
+        self._embed = embed
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.total_retries = 0
+        self.failed_texts = 0
+        self.last_run: dict[str, float] = {}
+
+    async def embed(self, texts: list[str]) -> list[list[float] | None]:
+        """Embed texts, preserving their order, with ``None`` for texts that failed."""
+        if not texts:
+            return []
+
+        started = time.perf_counter()
+        retries_before = self.total_retries
+        failed_before = self.failed_texts
+        batches = [texts[i : i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        results = await _gather(*(self._embed_batch(batch) for batch in batches))
+        for batch, vectors in zip(batches, results):
+            if len(batch) > 1 and all(vector is None for vector in vectors):
+                raise RuntimeError(f"None of a batch of {len(batch)} texts could be embedded")
+        elapsed = time.perf_counter() - started
+
+        tokens = sum(len(text) for text in texts) / 4
+        self.last_run = {
+            "texts": len(texts),
+            "batches": len(batches),
+            "retries": self.total_retries - retries_before,
+            "failed": self.failed_texts - failed_before,
+            "seconds": elapsed,
+            "texts_per_second": len(texts) / elapsed if elapsed else 0.0,
+            "tokens_per_second": tokens / elapsed if elapsed else 0.0,
+        }
+        if len(batches) > 1:
+            print(
+                f"Embedded {len(texts)} texts in {len(batches)} batches in {elapsed:.1f}s "
+                f"({self.last_run['texts_per_second']:.1f} texts/s, "
+                f"~{self.last_run['tokens_per_second']:.0f} tokens/s)"
+            )
+
+        return [vector for batch in results for vector in batch]
+
+    async def _embed_batch(self, texts: list[str]) -> list[list[float] | None]:
+        """Embed one batch with retries, splitting it when its input is rejected."""
+        attempt = 0
+        while True:
+            try:
+                async with self._semaphore:
+                    return await self._embed(texts)
+            except Exception as e:
+                if is_retryable(e) and attempt < self.max_retries:
+                    delay = min(self.max_delay, self.base_delay * 2**attempt)
+                    delay *= random.uniform(0.5, 1.5)
+                    attempt += 1
+                    self.total_retries += 1
+                    print(f"Embedding request throttled ({e}); retrying in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+                    continue
+                if is_retryable(e) or not is_invalid_input(e):
+                    raise
+                if len(texts) > 1:
+                    middle = len(texts) // 2
+                    first, second = await _gather(
+                        self._embed_batch(texts[:middle]),
+                        self._embed_batch(texts[middle:]),
+                    )
+                    return first + second
+                self.failed_texts += 1
+                print(f"Skipping text that cannot be embedded: {type(e).__name__}: {e}")
+                return [None]
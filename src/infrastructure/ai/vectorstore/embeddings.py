@@ -0,0 +1,79 @@
+"""Embedding providers for the vector store, selected by ``EMBEDDING_PROVIDER``."""
+
+import hashlib
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+from src.infrastructure.ai.vectorstore.lexical import tokenize
+from src.infrastructure.config.settings import Settings
+
+EMBEDDING_PROVIDERS = ("gemini", "hashing")
+
+
+class HashingEmbeddings(Embeddings):
+    """Deterministic feature-hashing vectorizer that runs locally.
+
+    Code-aware terms from :func:`tokenize` and adjacent term pairs are hashed
+    into ``dimension`` signed buckets, weighted by log term frequency and
+    L2-normalized. Texts sharing identifiers and phrases land close together,
+    which is enough to exercise indexing, search and recall measurements
+    without network access or a GPU. The same text always gets the same
+    vector, on every machine.
+    """
+
+    def __init__(self, dimension: int = 768) -> None:
+        self.dimension = dimension
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [self._embed(text).tolist() for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._embed(text).tolist()
+
+    def _embed(self, text: str) -> np.ndarray:
+        terms = tokenize(text)
+        features = terms + [f"{a} {b}" for a, b in zip(terms, terms[1:])]
+
+        counts: dict[int, float] = {}
+        for feature in features:
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+            value = int.from_bytes(digest, "little")
+            bucket = value % self.dimension
+            sign = 1.0 if value >> 63 else -1.0
+            counts[bucket] = counts.get(bucket, 0.0) + sign
+
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        for bucket, count in counts.items():
+            vector[bucket] = np.sign(count) * np.log1p(abs(count))
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+def create_embeddings(settings: Settings) -> Embeddings:
+    """Create the embedding provider configured in ``settings``."""
+    if settings.embedding_provider == "gemini":
+        return GoogleGenerativeAIEmbeddings(
+            model=f"models/{settings.gemini_embedding_model}",
+            google_api_key=settings.google_api_key,
+        )
+    if settings.embedding_provider == "hashing":
+        return HashingEmbeddings(settings.embedding_dimension)
+    raise ValueError(
+        f"Unknown embedding provider {settings.embedding_provider!r}; "
+        f"expected one of {', '.join(EMBEDDING_PROVIDERS)}"
+    )
+
+
+def embedding_model_id(settings: Settings) -> str:
+    """Identify the vector space of the configured provider.
+
+    Vectors with different ids are not comparable, so the id keys the
+    embedding cache and is recorded with every index snapshot.
+    """
+    if settings.embedding_provider == "gemini":
+        model = settings.gemini_embedding_model
+    else:
+        model = settings.embedding_provider
+    return f"{model}:{settings.embedding_dimension}"
@@ -0,0 +1,69 @@
+"""Original float32 vectors kept on disk next to a compressed index."""
+
+import os
+from pathlib import Path
+
+import numpy as np
+
+from src.infrastructure.ai.vectorstore.persistence import fsync_file
+
+
+class ExactVectors:
+    """Exact vectors addressed by index position, used to re-rank candidates.
+
+    Vectors of the last snapshot are memory-mapped from an ``.npy`` file, so
+    only the rows that are actually read are paged in, and the page cache is
+    shared by every worker process. Vectors added since the snapshot are held
+    in memory until the next one. ``_rows`` maps positions to rows and is
+    compacted on removal like ``IndexFlat.remove_ids``, which keeps it aligned
+    with the compressed index.
+    """
+
+    def __init__(self, base: np.ndarray) -> None:
+        self._base = base
+        self._tail = np.zeros((0, base.shape[1]), dtype=np.float32)
+        self._rows = np.arange(len(base), dtype=np.int64)
+
+    @classmethod
+    def open(cls, path: Path) -> "ExactVectors":
+        """Memory-map a file written by :meth:`save`."""
+        return cls(np.load(path, mmap_mode="r"))
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def append(self, vectors: np.ndarray) -> None:
+        """Add vectors for documents appended at the end of the index."""
+        first_row = len(self._base) + len(self._tail)
+        self._tail = np.concatenate([self._tail, np.asarray(vectors, dtype=np.float32)])
+        self._rows = np.concatenate(
+            [self._rows, np.arange(first_row, first_row + len(vectors), dtype=np.int64)]
+        )
+
+    def remove(self, positions: np.ndarray) -> None:
+        """Drop the vectors at ``positions`` and shift later positions down."""
+        self._rows = np.delete(self._rows, positions)
+
+    def get(self, positions: np.ndarray) -> np.ndarray:
+        """Get the vectors at ``positions`` as a float32 matrix."""
+        rows = self._rows[np.asarray(positions, dtype=np.int64)]
+        out = np.empty((len(rows), self._base.shape[1]), dtype=np.float32)
+        in_base = rows < len(self._base)
+        # Sorted reads keep memory-mapped access sequential.
+        base_rows = rows[in_base]
+        order = np.argsort(base_rows)
+        out[np.flatnonzero(in_base)[order]] = self._base[base_rows[order]]
+        out[~in_base] = self._tail[rows[~in_base] - len(self._base)]
+        return out
+
+    def all(self) -> np.ndarray:
+        """Get every vector in position order."""
+        return self.get(np.arange(len(self._rows)))
+
+    def save(self, path: Path) -> None:
+        """Write every vector in position order to ``path`` atomically."""
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            np.save(f, self.all())
+        fsync_file(tmp_path)
+        os.replace(tmp_path, path)
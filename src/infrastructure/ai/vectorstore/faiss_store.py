@@ -1,19 +1,79 @@
 """FAISS vector store for code repository indexing."""
 
+import asyncio
 import os
 import pickle
+import shutil
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from functools import partial
 from pathlib import Path
-from typing import Any
+from typing import Any, AsyncIterator, Callable
 
 import faiss
 import numpy as np
-from langchain_google_genai import GoogleGenerativeAIEmbeddings
 
-from src.infrastructure.config.settings import get_settings
+from src.infrastructure.ai.vectorstore.chunking import chunk_file, split_lines
+from src.infrastructure.ai.vectorstore.diversity import maximal_marginal_relevance
+from src.infrastructure.ai.vectorstore.document_store import (
+    DocumentFile,
+    write_document_file,
+)
+from src.infrastructure.ai.vectorstore.embedding_cache import EmbeddingCache, content_hash
+from src.infrastructure.ai.vectorstore.embedding_scheduler import EmbeddingScheduler
+from src.infrastructure.ai.vectorstore.embeddings import create_embeddings, embedding_model_id
+from src.infrastructure.ai.vectorstore.exact_vectors import ExactVectors
+from src.infrastructure.ai.vectorstore.index_factory import (
+    build_index,
+    build_vector_storage,
+    choose_index_type,
+    index_type_of,
+    owned_copy,
+    read_shared_index,
+    search_parameters,
+    storage_type_of,
+    supports_selector,
+)
+from src.infrastructure.ai.vectorstore.lexical import (
+    BM25Index,
+    looks_like_identifier,
+    reciprocal_rank_fusion,
+)
+from src.infrastructure.ai.vectorstore.metadata_index import (
+    FileCatalog,
+    MetadataColumns,
+    bitmap_selector,
+)
+from src.infrastructure.ai.vectorstore.offload import BlockingExecutor
+from src.infrastructure.ai.vectorstore.persistence import (
+    OP_ADD,
+    OP_CLEAR,
+    OP_FILES,
+    OP_REMOVE,
+    DeltaLog,
+    WriterLock,
+    fsync_file,
+    read_generations,
+    read_manifest,
+    read_version,
+    write_generations,
+    write_manifest,
+    write_version,
+)
+from src.infrastructure.ai.vectorstore.query_cache import LRUCache
+from src.infrastructure.ai.vectorstore.rwlock import RWLock
+from src.infrastructure.config.settings import Settings, get_settings
 
 
 class CodeDocument:
-    """Represents an indexed code file."""
+    """Represents an indexed chunk of a code file.
+
+    ``start_line`` and ``end_line`` are the 1-based inclusive line range of the
+    chunk within its parent file at ``folder_path/file_name``, and ``blob_sha``
+    is the git blob SHA of that file when it was indexed. Documents loaded
+    from disk read their ``content`` from the memory-mapped document file on
+    each access instead of keeping it in memory.
+    """
 
     def __init__(
         self,
@@ -23,13 +83,53 @@ class CodeDocument:
         file_name: str,
         file_type: str,
         file_url: str,
+        start_line: int = 1,
+        end_line: int | None = None,
+        blob_sha: str = "",
+        content_loader: Callable[[], str] | None = None,
     ):
-        self.content = content
+        self._content = content
+        self._content_loader = content_loader
         self.project_name = project_name
         self.folder_path = folder_path
         self.file_name = file_name
         self.file_type = file_type
         self.file_url = file_url
+        self.start_line = start_line
+        self.end_line = (
+            end_line if end_line is not None else start_line + max(len(split_lines(content)), 1) - 1
+        )
+        self.blob_sha = blob_sha
+
+    @property
+    def content(self) -> str:
+        """The chunk text."""
+        if self._content_loader is not None:
+            return self._content_loader()
+        return self._content
+
+    @property
+    def file_path(self) -> str:
+        """Path of the parent file within its project."""
+        return f"{self.folder_path}/{self.file_name}".lstrip("/")
+
+    @classmethod
+    def from_file(cls, file: dict[str, Any]) -> list["CodeDocument"]:
+        """Split an indexed file into one document per chunk."""
+        return [
+            cls(
+                content=chunk.content,
+                project_name=file["project_name"],
+                folder_path=file["folder_path"],
+                file_name=file["file_name"],
+                file_type=file["file_type"],
+                file_url=file["file_url"],
+                start_line=chunk.start_line,
+                end_line=chunk.end_line,
+                blob_sha=file.get("blob_sha", ""),
+            )
+            for chunk in chunk_file(file["content"], file["file_name"])
+        ]
 
     def to_dict(self) -> dict[str, Any]:
         return {
@@ -39,6 +139,9 @@ class CodeDocument:
             "file_name": self.file_name,
             "file_type": self.file_type,
             "file_url": self.file_url,
+            "start_line": self.start_line,
+            "end_line": self.end_line,
+            "blob_sha": self.blob_sha,
         }
 
     @classmethod
@@ -50,46 +153,489 @@ class CodeDocument:
             file_name=data["file_name"],
             file_type=data["file_type"],
             file_url=data["file_url"],
+            start_line=data.get("start_line", 1),
+            end_line=data.get("end_line"),
+            blob_sha=data.get("blob_sha", ""),
         )
 
 
+MIN_ANN_VECTORS = 1000
+
+
+@dataclass
+class _Snapshot:
+    """State read from a snapshot, before it replaces the store's state."""
+
+    generation: str
+    index_path: Path
+    embedding_model: str
+    seq: int
+    snapshot_seq: int
+    vectors: faiss.Index | None = None
+    ann: faiss.Index | None = None
+    exact: ExactVectors | None = None
+    documents: list[CodeDocument] = field(default_factory=list)
+    metadata: MetadataColumns = field(default_factory=MetadataColumns)
+    catalog: FileCatalog = field(default_factory=FileCatalog)
+    lexical: BM25Index = field(default_factory=BM25Index)
+    empty_files: dict[str, dict[str, str]] = field(default_factory=dict)
+    mapped: bool = True
+    ann_trained_on: int = 0
+    storage_trained_on: int = 0
+    needs_snapshot: bool = False
+
+
 class FAISSVectorStore:
-    """FAISS-based vector store for semantic code search."""
+    """FAISS-based vector store for semantic code search.
 
-    def __init__(self) -> None:
-        settings = get_settings()
-        self.embeddings = GoogleGenerativeAIEmbeddings(
-            model=f"models/{settings.gemini_embedding_model}",
-            google_api_key=settings.google_api_key,
-        )
+    ``vectors`` is a flat index of every document vector, aligned with
+    ``documents`` by position, stored as float32 or compressed. With
+    compressed storage the original vectors are kept on disk in ``_exact`` to
+    re-rank candidates. ``index`` is what searches run against: either
+    ``vectors`` itself or an approximate index built from the exact vectors.
+
+    FAISS searches, normalization and disk I/O run on a bounded thread pool so
+    they do not stall the event loop. Reads of the in-memory state hold the
+    ``_state`` lock shared, so searches run concurrently. Writes are
+    serialized by ``_write_lock`` and do their embedding, logging, index
+    building and snapshot I/O while searches continue on the current state;
+    they hold ``_state`` exclusively only to apply or swap in their result.
+    Searches therefore always see a matching index and document list.
+
+    Worker processes serving the same ``index_path`` memory-map the snapshot
+    indexes and share their pages. Writes are serialized across processes by
+    a file lock and publish a new ``version`` file; :meth:`start_watching`
+    polls it so every worker reloads the changes without a restart.
+
+    Full rebuilds go into a :meth:`shadow` store in a new generation
+    directory under ``root`` that readers cannot see, until :meth:`swap`
+    atomically switches to it. ``index_path`` is the directory of the
+    generation being served.
+    """
+
+    def __init__(
+        self,
+        root: Path | None = None,
+        shared: "FAISSVectorStore | None" = None,
+        settings: Settings | None = None,
+    ) -> None:
+        settings = settings or get_settings()
+        self._settings = settings
         self.dimension = settings.embedding_dimension
-        self.index_path = Path(settings.faiss_index_path)
-        self.index: faiss.IndexFlatIP | None = None
+        if shared is not None:
+            # Shadow stores embed through the same cache, rate limits and threads.
+            self.embeddings = shared.embeddings
+            self.embedding_model = shared.embedding_model
+            self.embedding_cache = shared.embedding_cache
+            self.embedding_scheduler = shared.embedding_scheduler
+        else:
+            self.embeddings = create_embeddings(settings)
+            self.embedding_model = embedding_model_id(settings)
+            self.embedding_cache = EmbeddingCache(
+                Path(settings.embedding_cache_path),
+                model=self.embedding_model,
+                max_entries=settings.embedding_cache_max_entries,
+            )
+            self.embedding_scheduler = EmbeddingScheduler(
+                lambda texts: self.embeddings.aembed_documents(texts),
+                batch_size=settings.embedding_batch_size,
+                max_concurrency=settings.embedding_max_concurrency,
+                max_retries=settings.embedding_max_retries,
+            )
+        self.root = root or Path(settings.faiss_index_path)
+        self.generation = ""
+        self.index_path = self.root
+        self.document_compression = settings.document_compression
+        self.compaction_bytes = settings.index_compaction_bytes
+        self._log = DeltaLog(self.index_path / "delta.log", self.dimension)
+        self._writer_lock = WriterLock(self.root / "writer.lock")
+        self._seen_version = ""
+        self.reload_interval = settings.index_reload_interval
+        self._watcher: asyncio.Task[None] | None = None
+        self._seq = 0
+        self._snapshot_seq = -1
+        self.index_type = settings.index_type
+        self.target_recall = settings.index_target_recall
+        self.flat_threshold = settings.index_flat_threshold
+        self.vector_storage = settings.vector_storage
+        self.rerank_factor = settings.vector_rerank_factor
+        self.mmr_lambda = settings.search_mmr_lambda
+        self.vectors: faiss.Index | None = None
+        self.index: faiss.Index | None = None
+        self._exact: ExactVectors | None = None
+        self._mapped = False
+        self._ann_trained_on = 0
+        self._storage_trained_on = 0
         self.documents: list[CodeDocument] = []
+        self._metadata = MetadataColumns()
+        self.catalog = FileCatalog()
+        self.lexical = BM25Index()
+        # Blob SHAs of indexed files without chunks, such as empty, binary or
+        # oversized files, per project, so unchanged ones are not refetched.
+        self._empty_files: dict[str, dict[str, str]] = {}
+        self.version = 0
+        self._query_embeddings: LRUCache[str, np.ndarray] = LRUCache(
+            settings.query_embedding_cache_size
+        )
+        self._search_results: LRUCache[tuple[Any, ...], list[dict[str, Any]]] = LRUCache(
+            settings.search_result_cache_size
+        )
+        self._executor = (
+            shared._executor
+            if shared is not None
+            else BlockingExecutor(settings.vectorstore_threads, settings.vectorstore_queue_size)
+        )
+        self._write_lock = asyncio.Lock()
+        self._state = RWLock()
         self._initialized = False
 
     async def initialize(self) -> None:
-        """Initialize the vector store, loading existing index if available."""
+        """Initialize the vector store, loading existing index if available.
+
+        The latest snapshot is loaded and newer delta log records are replayed.
+        If the vector count and document count still disagree afterwards, or
+        the snapshot was embedded by a different embedding model, the vectors
+        are rebuilt from the documents through the embedding cache.
+        """
         if self._initialized:
             return
 
-        self.index_path.mkdir(parents=True, exist_ok=True)
+        async with self._write_lock, self._exclusive():
+            if self._initialized:
+                return
+
+            needs_snapshot, snapshot_model = await self._load_snapshot()
 
-        index_file = self.index_path / "index.faiss"
-        docs_file = self.index_path / "documents.pkl"
+            if snapshot_model != self.embedding_model:
+                print(
+                    f"FAISS index was embedded with {snapshot_model}, not "
+                    f"{self.embedding_model}; rebuilding vectors from documents"
+                )
+                await self._rebuild_vectors()
+                needs_snapshot = True
+            elif self.vectors.ntotal != len(self.documents):
+                print(
+                    f"FAISS index has {self.vectors.ntotal} vectors but "
+                    f"{len(self.documents)} documents; rebuilding vectors from documents"
+                )
+                await self._rebuild_vectors()
+                needs_snapshot = True
 
-        if index_file.exists() and docs_file.exists():
-            self.index = faiss.read_index(str(index_file))
-            with open(docs_file, "rb") as f:
+            storage_changed = await self._refresh_storage()
+            if await self._refresh_ann() or storage_changed or needs_snapshot:
+                await self._compact(force=True)
+
+            print(
+                f"Loaded FAISS index with {len(self.documents)} documents "
+                f"({self._current_index_type()} search index)"
+            )
+            self._initialized = True
+
+    async def _load_snapshot(self, repair: bool = True) -> tuple[bool, str]:
+        """Load the latest snapshot of the current generation and replay the delta log.
+
+        Files are read without blocking searches, which only wait while the
+        loaded state is swapped in. Returns whether the loaded state should
+        be written as a new snapshot, e.g. because it came from a legacy file
+        layout, and the embedding model the snapshot was built with.
+        ``repair`` is passed on to :meth:`_replay_log`.
+        """
+        snapshot = await self._executor.run("read_snapshot", self._read_snapshot)
+        async with self._state.write():
+            needs_snapshot = await self._executor.run(
+                "install_snapshot", self._install_snapshot, snapshot, repair
+            )
+        return needs_snapshot, snapshot.embedding_model
+
+    def _read_snapshot(self) -> "_Snapshot":
+        """Read the latest snapshot of the current generation.
+
+        Index files are memory-mapped, so worker processes serving the same
+        snapshot share its pages. Snapshots that predate recording the
+        embedding model are assumed to match the configured one.
+        """
+        generation = read_generations(self.root)["current"]
+        index_path = self.root / generation if generation else self.root
+        index_path.mkdir(parents=True, exist_ok=True)
+
+        manifest = read_manifest(index_path)
+        legacy_index_file = index_path / "index.faiss"
+        legacy_docs_file = index_path / "documents.bin"
+        legacy_pickle_file = index_path / "documents.pkl"
+        snapshot = _Snapshot(
+            generation=generation,
+            index_path=index_path,
+            embedding_model=self.embedding_model,
+            seq=self._seq if generation == self.generation else 0,
+            snapshot_seq=self._snapshot_seq if generation == self.generation else -1,
+        )
+        lexical: BM25Index | None = None
+
+        if manifest is not None:
+            snapshot.embedding_model = manifest.get("embedding_model", self.embedding_model)
+            snapshot.vectors = read_shared_index(index_path / manifest["index_file"])
+            snapshot.documents = self._load_documents(index_path / manifest["documents_file"])
+            snapshot.seq = snapshot.snapshot_seq = manifest["seq"]
+            if manifest.get("vectors_file"):
+                snapshot.exact = ExactVectors.open(index_path / manifest["vectors_file"])
+                snapshot.storage_trained_on = manifest.get(
+                    "storage_trained_on", len(snapshot.exact)
+                )
+            if manifest.get("ann_file"):
+                ann = read_shared_index(index_path / manifest["ann_file"])
+                if ann.ntotal == snapshot.vectors.ntotal:
+                    snapshot.ann = ann
+                    snapshot.ann_trained_on = manifest.get("ann_trained_on", ann.ntotal)
+            if manifest.get("lexical_file"):
+                lexical = BM25Index.load(index_path / manifest["lexical_file"])
+            snapshot.empty_files = manifest.get("empty_files", {})
+        elif legacy_index_file.exists() and legacy_docs_file.exists():
+            snapshot.vectors = read_shared_index(legacy_index_file)
+            snapshot.documents = self._load_documents(legacy_docs_file)
+            snapshot.needs_snapshot = True
+        elif legacy_index_file.exists() and legacy_pickle_file.exists():
+            snapshot.vectors = read_shared_index(legacy_index_file)
+            with open(legacy_pickle_file, "rb") as f:
                 docs_data = pickle.load(f)
-                self.documents = [CodeDocument.from_dict(d) for d in docs_data]
-            print(f"Loaded FAISS index with {len(self.documents)} documents")
+                snapshot.documents = [CodeDocument.from_dict(d) for d in docs_data]
+            snapshot.needs_snapshot = True
         else:
-            self.index = faiss.IndexFlatIP(self.dimension)
-            self.documents = []
-            print("Created new empty FAISS index")
+            snapshot.vectors = faiss.IndexFlatIP(self.dimension)
+            snapshot.mapped = False
+
+        if lexical is None or len(lexical) != len(snapshot.documents):
+            lexical = BM25Index()
+            lexical.add(doc.content for doc in snapshot.documents)
+            snapshot.needs_snapshot = True
+        snapshot.lexical = lexical
+        snapshot.metadata.rebuild(snapshot.documents)
+        snapshot.catalog.rebuild(snapshot.documents)
+        return snapshot
+
+    def _install_snapshot(self, snapshot: "_Snapshot", repair: bool) -> bool:
+        """Replace the in-memory state by a read snapshot and replay the log.
+
+        Returns whether the state should be written as a new snapshot.
+        """
+        self.generation, self.index_path = snapshot.generation, snapshot.index_path
+        self._log = DeltaLog(snapshot.index_path / "delta.log", self.dimension)
+        self.vectors = snapshot.vectors
+        self.index = snapshot.ann if snapshot.ann is not None else snapshot.vectors
+        self._mapped = snapshot.mapped
+        self._exact = snapshot.exact
+        self.documents = snapshot.documents
+        self._metadata = snapshot.metadata
+        self.catalog = snapshot.catalog
+        self.lexical = snapshot.lexical
+        self._empty_files = snapshot.empty_files
+        self._seq, self._snapshot_seq = snapshot.seq, snapshot.snapshot_seq
+        self._ann_trained_on = snapshot.ann_trained_on
+        self._storage_trained_on = snapshot.storage_trained_on
+        self._bump_version()
+
+        replayed = self._replay_log(repair=repair)
+        if replayed:
+            print(f"Replayed {replayed} delta log records")
+
+        if self._exact is not None and len(self._exact) != self.vectors.ntotal:
+            print("Exact vectors do not match the index; re-ranking is disabled until rebuilt")
+            self._exact = None
+            return True
+        return snapshot.needs_snapshot
+
+    async def _sync(self, repair: bool = False) -> bool:
+        """Catch up with snapshots and log records written by other processes.
+
+        A newer snapshot or generation is loaded in full, which also drops
+        the private copies made by :meth:`_make_writable`; otherwise only new
+        delta log records are applied. ``repair`` truncates a torn log tail
+        and must only be set while holding the writer lock. Returns whether
+        anything changed. Must be called with ``_write_lock`` held.
+        """
+        if await self._executor.run("check_snapshot", self._snapshot_changed):
+            await self._load_snapshot(repair=repair)
+            return True
+        async with self._state.write():
+            return await self._executor.run("replay_log", self._replay_log, repair) > 0
+
+    def _snapshot_changed(self) -> bool:
+        """Whether another process switched generations or wrote a snapshot."""
+        if read_generations(self.root)["current"] != self.generation:
+            return True
+        manifest = read_manifest(self.index_path)
+        return manifest is not None and manifest["seq"] != self._snapshot_seq
+
+    @asynccontextmanager
+    async def _exclusive(self) -> AsyncIterator[None]:
+        """Hold the cross-process writer lock, publishing the version on exit."""
+        await self._executor.run("writer_lock", self._writer_lock.acquire)
+        try:
+            yield
+        finally:
+            try:
+                self._seen_version = await self._executor.run(
+                    "write_version",
+                    write_version,
+                    self.root,
+                    self.generation,
+                    self._seq,
+                    self._snapshot_seq,
+                )
+            finally:
+                self._writer_lock.release()
+
+    @asynccontextmanager
+    async def _writing(self) -> AsyncIterator[None]:
+        """Lock the store for a write on top of the latest state on disk.
+
+        Changes written by other worker processes since the last reload are
+        applied first, so positions computed inside refer to the current log.
+        """
+        async with self._write_lock, self._exclusive():
+            await self._sync(repair=True)
+            yield
+
+    async def reload(self) -> bool:
+        """Apply index changes written by other worker processes.
+
+        Returns whether anything changed. A snapshot replaced while it was
+        being read raises; the next call picks up the newer one.
+        """
+        if not self._initialized:
+            await self.initialize()
+            return True
+
+        version = await self._executor.run("read_version", read_version, self.root)
+        if version == self._seen_version:
+            return False
+        async with self._write_lock:
+            changed = await self._sync()
+        self._seen_version = version
+        if changed:
+            print(f"Reloaded FAISS index with {len(self.documents)} documents")
+        return changed
+
+    def start_watching(self) -> None:
+        """Poll the version file and reload on change, every ``reload_interval`` seconds."""
+        if self.reload_interval > 0 and self._watcher is None:
+            self._watcher = asyncio.create_task(self._watch())
 
-        self._initialized = True
+    async def stop_watching(self) -> None:
+        """Stop the task started by :meth:`start_watching`."""
+        if self._watcher is None:
+            return
+        self._watcher.cancel()
+        try:
+            await self._watcher
+        except asyncio.CancelledError:
+            pass
+        self._watcher = None
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                await self.reload()
+            except Exception as e:
+                print(f"Error reloading FAISS index: {e}")
+
+    async def shadow(self) -> "FAISSVectorStore":
+        """Create an empty store in a new generation for a full rebuild.
+
+        Searches keep being served from the current generation while the
+        shadow is filled; pass it to :meth:`swap` when done, or to
+        :meth:`discard` to give up.
+        """
+        if not self._initialized:
+            await self.initialize()
+
+        name = await self._executor.run("new_generation", self._new_generation)
+        store = FAISSVectorStore(self.root / name, shared=self, settings=self._settings)
+        await store.initialize()
+        return store
+
+    async def swap(self, shadow: "FAISSVectorStore") -> None:
+        """Atomically make a generation built by :meth:`shadow` the current one.
+
+        The generation served until now is kept as the previous one for
+        :meth:`rollback`, and older ones are deleted. Searches hold the store
+        lock, so those in flight finish on the generation they started on.
+        """
+        if shadow.root.parent != self.root:
+            raise ValueError(f"{shadow.root} is not a generation of {self.root}")
+
+        await shadow.compact()
+        async with self._writing():
+            await self._executor.run(
+                "switch_generation", write_generations, self.root, shadow.root.name, self.generation
+            )
+            await self._load_snapshot()
+            await self._executor.run("prune_generations", self._prune_generations)
+        print(
+            f"Switched FAISS index to generation {self.generation} "
+            f"with {len(self.documents)} documents"
+        )
+
+    async def rollback(self) -> None:
+        """Switch back to the generation served before the last :meth:`swap`.
+
+        The generation rolled back from becomes the previous one, so a second
+        rollback undoes the first.
+        """
+        if not self._initialized:
+            await self.initialize()
+
+        async with self._writing():
+            previous = read_generations(self.root).get("previous")
+            if previous is None:
+                raise ValueError("No previous index generation to roll back to")
+            await self._executor.run(
+                "switch_generation", write_generations, self.root, previous, self.generation
+            )
+            await self._load_snapshot()
+        print(
+            f"Rolled FAISS index back to generation {self.generation or '(initial)'} "
+            f"with {len(self.documents)} documents"
+        )
+
+    async def discard(self, shadow: "FAISSVectorStore") -> None:
+        """Delete a shadow generation that will not be swapped in."""
+        if shadow.root.parent == self.root and shadow.root.name != self.generation:
+            await self._executor.run("discard_generation", shutil.rmtree, shadow.root, True)
+
+    def _new_generation(self) -> str:
+        """Create the directory of a generation newer than every existing one."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        number = max(
+            (int(path.name[4:]) for path in self.root.glob("gen-*") if path.name[4:].isdigit()),
+            default=0,
+        )
+        while True:
+            number += 1
+            try:
+                (self.root / f"gen-{number}").mkdir()
+                return f"gen-{number}"
+            except FileExistsError:
+                continue
+
+    def _prune_generations(self) -> None:
+        """Delete generations older than both the current and previous one.
+
+        Newer generations may be shadows still being built by another worker.
+        The initial generation, kept directly in ``root``, is deleted once it
+        is neither current nor previous.
+        """
+        generations = read_generations(self.root)
+        keep = {generations["current"], generations.get("previous")}
+        numbers = [int(name[4:]) for name in keep if name and name.startswith("gen-")]
+        oldest = min(numbers, default=0)
+        for path in self.root.glob("gen-*"):
+            if path.name[4:].isdigit() and int(path.name[4:]) < oldest:
+                shutil.rmtree(path, ignore_errors=True)
+        if "" not in keep:
+            self._remove_stale_snapshots(self.root, set())
+            for name in ("snapshot.json", "delta.log"):
+                (self.root / name).unlink(missing_ok=True)
 
     async def add_documents(self, documents: list[CodeDocument]) -> None:
         """Add documents to the vector store."""
@@ -99,16 +645,455 @@ class FAISSVectorStore:
         if not documents:
             return
 
-        texts = [doc.content for doc in documents]
-        embeddings = await self._get_embeddings(texts)
+        documents, embeddings = await self._embed_documents(documents)
+        if not documents:
+            return
+        async with self._writing():
+            await self._append(documents, embeddings)
+            await self._save_index()
+
+    async def compact(self) -> None:
+        """Write a new snapshot and empty the delta log."""
+        if not self._initialized:
+            await self.initialize()
+
+        async with self._writing():
+            await self._compact()
+
+    async def _embed_documents(
+        self, documents: list[CodeDocument]
+    ) -> tuple[list[CodeDocument], np.ndarray]:
+        """Get the normalized embeddings of documents.
+
+        Documents that cannot be embedded are dropped, so the returned
+        documents and embeddings stay aligned.
+        """
+        embeddings, embedded = await self._get_embeddings([doc.content for doc in documents])
+        if len(embedded) < len(documents):
+            kept = set(embedded)
+            for i, doc in enumerate(documents):
+                if i not in kept:
+                    print(f"Dropping unembeddable chunk {doc.file_path}:{doc.start_line}")
+            documents = [documents[i] for i in embedded]
+        await self._executor.run("normalize", faiss.normalize_L2, embeddings)
+        return documents, embeddings
+
+    async def _append(self, documents: list[CodeDocument], embeddings: np.ndarray) -> None:
+        """Log documents with their normalized embeddings and append them to the index."""
+        await self._log_add(documents, embeddings)
+        await self._prepare_write()
+        async with self._state.write():
+            await self._executor.run("apply", self._apply_add, documents, embeddings)
+
+    async def _remove_positions(self, positions: list[int]) -> int:
+        """Log and remove the documents at the given index positions."""
+        if not positions:
+            return 0
+
+        positions_array = np.array(sorted(positions), dtype=np.int64)
+        await self._log_remove(positions_array)
+        await self._prepare_write()
+        async with self._state.write():
+            await self._executor.run("apply", self._apply_remove, positions_array)
+        return len(positions)
+
+    async def _update_empty_files(self, project_name: str, shas: dict[str, str | None]) -> None:
+        """Log and record blob SHAs of files without chunks; ``None`` forgets a path."""
+        if not shas:
+            return
+
+        await self._log_files(project_name, shas)
+        async with self._state.write():
+            self._apply_files(project_name, shas)
+
+    async def _log_add(self, documents: list[CodeDocument], embeddings: np.ndarray) -> None:
+        """Durably log documents with their normalized embeddings, without applying them."""
+        seq = self._seq + 1
+        await self._executor.run(
+            "log_append",
+            self._log.append_add,
+            seq,
+            [doc.to_dict() for doc in documents],
+            embeddings,
+        )
+        self._seq = seq
 
-        faiss.normalize_L2(embeddings)
+    async def _log_remove(self, positions: np.ndarray) -> None:
+        """Durably log the removal of documents, without applying it."""
+        seq = self._seq + 1
+        await self._executor.run("log_append", self._log.append_remove, seq, positions)
+        self._seq = seq
 
-        if self.index is not None:
+    async def _log_files(self, project_name: str, shas: dict[str, str | None]) -> None:
+        """Durably log blob SHAs of files without chunks, without applying them."""
+        seq = self._seq + 1
+        await self._executor.run("log_append", self._log.append_files, seq, project_name, shas)
+        self._seq = seq
+
+    def _make_writable(self) -> None:
+        """Replace memory-mapped indexes by private copies before mutating them.
+
+        FAISS cannot add to or remove from an index whose codes live in a
+        mapped file, so the first mutation after loading a snapshot copies
+        them. The next snapshot maps them again.
+        """
+        if self._mapped:
+            self.vectors, self.index = self._owned_indexes()
+            self._mapped = False
+
+    async def _prepare_write(self) -> None:
+        """Run :meth:`_make_writable` with the copying done outside the state lock."""
+        if not self._mapped:
+            return
+        vectors, index = await self._executor.run("copy_index", self._owned_indexes)
+        async with self._state.write():
+            self.vectors, self.index = vectors, index
+            self._mapped = False
+
+    def _owned_indexes(self) -> tuple[faiss.Index | None, faiss.Index | None]:
+        """Private copies of ``vectors`` and ``index``, keeping them identical if they are."""
+        vectors = owned_copy(self.vectors) if self.vectors is not None else None
+        if self.index is None or self.index is self.vectors:
+            return vectors, vectors
+        return vectors, owned_copy(self.index)
+
+    def _apply_add(self, documents: list[CodeDocument], embeddings: np.ndarray) -> None:
+        """Append documents and their normalized vectors to the index."""
+        self._make_writable()
+        if self.vectors is not None:
+            self.vectors.add(embeddings)
+        if self.index is not None and self.index is not self.vectors:
             self.index.add(embeddings)
+        if self._exact is not None:
+            self._exact.append(embeddings)
         self.documents.extend(documents)
+        self._metadata.append(documents)
+        self.catalog.append(documents)
+        self.lexical.add(doc.content for doc in documents)
+        self._bump_version()
+
+    def _apply_remove(self, positions: np.ndarray) -> None:
+        """Remove documents at the given positions, keeping positions aligned.
+
+        ``IndexFlat.remove_ids`` compacts the remaining vectors in order, so
+        filtering ``self.documents`` the same way keeps both in sync. Other
+        index types keep their ids on removal, so searches fall back to the
+        exact index until the search index is rebuilt at the next compaction.
+        """
+        self._make_writable()
+        if self.vectors is not None:
+            self.vectors.remove_ids(positions)
+        if self._exact is not None:
+            self._exact.remove(positions)
+        self.index = self.vectors
+        removed = set(positions.tolist())
+        self.documents = [doc for i, doc in enumerate(self.documents) if i not in removed]
+        self._metadata.rebuild(self.documents)
+        self.catalog.rebuild(self.documents)
+        self.lexical.remove(positions)
+        self._bump_version()
+
+    def _apply_replace(
+        self,
+        positions: np.ndarray,
+        documents: list[CodeDocument],
+        embeddings: np.ndarray | None,
+        project_name: str,
+        shas: dict[str, str | None],
+    ) -> None:
+        """Remove, append and record the changes of :meth:`replace_files` in one step."""
+        if len(positions):
+            self._apply_remove(positions)
+        if documents:
+            self._apply_add(documents, embeddings)
+        if shas:
+            self._apply_files(project_name, shas)
+
+    def _apply_files(self, project_name: str, shas: dict[str, str | None]) -> None:
+        """Record or forget blob SHAs of a project's files without chunks."""
+        files = self._empty_files.setdefault(project_name, {})
+        for path, sha in shas.items():
+            if sha is None:
+                files.pop(path, None)
+            else:
+                files[path] = sha
+        if not files:
+            del self._empty_files[project_name]
+
+    def _apply_clear(self) -> None:
+        """Drop every document and vector."""
+        self.vectors = faiss.IndexFlatIP(self.dimension)
+        self.index = self.vectors
+        self._mapped = False
+        self._exact = None
+        self.documents = []
+        self._metadata.clear()
+        self.catalog.clear()
+        self.lexical.clear()
+        self._empty_files = {}
+        self._bump_version()
+
+    def _replay_log(self, repair: bool = True) -> int:
+        """Apply delta log records newer than the loaded state.
+
+        Only a process holding the writer lock may ``repair`` a torn log
+        tail; for others it may be a record that is still being appended.
+        Without ``repair``, replay also stops at a gap in sequence numbers:
+        the log was reset by a compaction after the snapshot was read, and
+        its records belong to the newer snapshot.
+        """
+        replayed = 0
+        for record in self._log.replay(after_seq=self._seq, repair=repair):
+            if not repair and record.seq != self._seq + 1:
+                break
+            if record.op == OP_ADD and record.vectors is not None:
+                documents = [CodeDocument.from_dict(d) for d in record.documents]
+                self._apply_add(documents, record.vectors.copy())
+            elif record.op == OP_REMOVE and record.positions is not None:
+                self._apply_remove(record.positions)
+            elif record.op == OP_CLEAR:
+                self._apply_clear()
+            elif record.op == OP_FILES:
+                self._apply_files(record.project_name, record.shas)
+            self._seq = record.seq
+            replayed += 1
+        return replayed
+
+    async def _rebuild_vectors(self) -> None:
+        """Recreate the FAISS index from the documents, which are authoritative."""
+        vectors = faiss.IndexFlatIP(self.dimension)
+        documents = self.documents
+        if documents:
+            documents, embeddings = await self._embed_documents(documents)
+            vectors.add(embeddings)
+        async with self._state.write():
+            if len(documents) < len(self.documents):
+                self.documents = documents
+                self._metadata.rebuild(documents)
+                self.catalog.rebuild(documents)
+                self.lexical = BM25Index()
+                self.lexical.add(doc.content for doc in documents)
+            self.vectors = vectors
+            self.index = vectors
+            self._mapped = False
+            self._exact = None
+            self._bump_version()
+
+    async def _refresh_ann(self) -> bool:
+        """Build the configured search index if it is missing or out of date.
+
+        With ``INDEX_TYPE=auto`` the type follows corpus size and target
+        recall. IVF indexes are retrained once the corpus has doubled since
+        they were trained. Returns whether a new index was built.
+        """
+        if self.vectors is None:
+            return False
+
+        num_vectors = self.vectors.ntotal
+        wanted = self.index_type
+        if wanted == "auto":
+            wanted = choose_index_type(num_vectors, self.target_recall, self.flat_threshold)
+        if wanted == "flat" or num_vectors < MIN_ANN_VECTORS:
+            if self.index is not self.vectors:
+                async with self._state.write():
+                    self.index = self.vectors
+                    self._bump_version()
+            return False
+
+        if (
+            self._current_index_type() == wanted
+            and self.index is not None
+            and self.index.ntotal == num_vectors
+            and num_vectors <= 2 * self._ann_trained_on
+        ):
+            return False
+
+        print(f"Building {wanted} search index over {num_vectors} vectors...")
+        index = await self._executor.run(
+            "build_index", lambda: build_index(wanted, self._exact_matrix())
+        )
+        async with self._state.write():
+            self.index = index
+            self._ann_trained_on = num_vectors
+            self._bump_version()
+        return True
+
+    async def _refresh_storage(self) -> bool:
+        """Convert ``vectors`` to the configured storage type if needed.
+
+        Small corpora stay float32, like they stay on exact search. Trained
+        storage types are retrained once the corpus has doubled since they
+        were trained. Returns whether the storage was rebuilt.
+        """
+        if self.vectors is None:
+            return False
+
+        num_vectors = self.vectors.ntotal
+        wanted = self.vector_storage if num_vectors >= MIN_ANN_VECTORS else "float32"
+        if storage_type_of(self.vectors) == wanted and (
+            wanted in ("float32", "float16") or num_vectors <= 2 * self._storage_trained_on
+        ):
+            return False
+
+        print(f"Storing {num_vectors} vectors as {wanted}...")
+        exact = await self._executor.run("read_vectors", self._exact_matrix)
+        vectors = await self._executor.run("build_storage", build_vector_storage, wanted, exact)
+        async with self._state.write():
+            if self.index is self.vectors:
+                self.index = vectors
+            self.vectors = vectors
+            self._exact = None if wanted == "float32" else ExactVectors(exact)
+            self._storage_trained_on = num_vectors
+            self._bump_version()
+        return True
+
+    def _exact_matrix(self) -> np.ndarray:
+        """All vectors in position order, exact whenever the originals are available."""
+        if self._exact is not None:
+            return self._exact.all()
+        return self.vectors.reconstruct_n(0, self.vectors.ntotal)
+
+    def _current_index_type(self) -> str:
+        """Type of the index searches currently run against."""
+        if self.index is None or self.index is self.vectors:
+            return "flat"
+        return index_type_of(self.index)
+
+    async def get_file_shas(self, project_name: str) -> dict[str, str]:
+        """Get the indexed blob SHA of every file in a project, keyed by path.
+
+        Files indexed without chunks are included, so they count as
+        unchanged as long as their SHA is.
+        """
+        if not self._initialized:
+            await self.initialize()
+
+        async with self._state.read():
+            shas = dict(self._empty_files.get(project_name, {}))
+            shas.update(
+                (path, self.documents[positions[0]].blob_sha)
+                for path, positions in self._project_files(project_name).items()
+            )
+            return shas
+
+    async def list_files(
+        self, project_name: str, file_type: str | None = None
+    ) -> list[tuple[str, str]]:
+        """List ``(path, file type)`` of a project's files, sorted by path.
+
+        The project name is matched case-insensitively.
+        """
+        if not self._initialized:
+            await self.initialize()
 
-        await self._save_index()
+        async with self._state.read():
+            project = self.catalog.project(project_name)
+            if project is None:
+                return []
+            return sorted(
+                (path, path_type)
+                for path, path_type in project.file_types.items()
+                if file_type is None or path_type == file_type
+            )
+
+    async def get_file_chunks(self, project_name: str, file_path: str) -> list[CodeDocument]:
+        """Get the chunks of a file in line order.
+
+        The project name is matched case-insensitively and ``file_path`` may be
+        a trailing part of the indexed path, such as ``"main.py"`` for
+        ``"src/main.py"``. Returns an empty list when no file matches.
+        """
+        if not self._initialized:
+            await self.initialize()
+
+        async with self._state.read():
+            project = self.catalog.project(project_name)
+            path = project.resolve(file_path) if project else None
+            if project is None or path is None:
+                return []
+            chunks = [self.documents[position] for position in project.positions[path]]
+        return sorted(chunks, key=lambda doc: doc.start_line)
+
+    def _project_files(self, project_name: str) -> dict[str, list[int]]:
+        """Chunk positions per path of a project, matched by exact name."""
+        project = self.catalog.project(project_name)
+        if project is None or project.name != project_name:
+            return {}
+        return project.positions
+
+    async def replace_files(
+        self,
+        project_name: str,
+        documents: list[CodeDocument],
+        removed_paths: set[str] | None = None,
+        empty_files: dict[str, str] | None = None,
+    ) -> None:
+        """Replace the chunks of changed files and drop removed files.
+
+        Existing chunks of every file in ``documents``, of every path in
+        ``removed_paths`` and of every path in ``empty_files`` are deleted
+        before the new chunks are added. ``empty_files`` maps changed files
+        that produced no chunks to their blob SHAs, which are recorded for
+        :meth:`get_file_shas`.
+
+        The new chunks are embedded beforehand and every change is logged
+        before any is applied; removal and addition are then applied under
+        a single hold of the state lock, so searches never observe the
+        changed files missing from the index.
+        """
+        if not self._initialized:
+            await self.initialize()
+
+        empty_files = empty_files or {}
+        stale_paths = set(removed_paths or ()) | set(empty_files)
+        stale_paths.update(doc.file_path for doc in documents)
+        embeddings = None
+        if documents:
+            documents, embeddings = await self._embed_documents(documents)
+
+        async with self._writing():
+            files = self._project_files(project_name)
+            known_empty = self._empty_files.get(project_name, {})
+            positions = np.array(
+                sorted(position for path in stale_paths for position in files.get(path, ())),
+                dtype=np.int64,
+            )
+            shas = {path: None for path in stale_paths if path in known_empty}
+            shas.update(empty_files)
+
+            if len(positions):
+                await self._log_remove(positions)
+            if documents:
+                await self._log_add(documents, embeddings)
+            if shas:
+                await self._log_files(project_name, shas)
+            await self._prepare_write()
+            async with self._state.write():
+                await self._executor.run(
+                    "apply",
+                    self._apply_replace,
+                    positions,
+                    documents,
+                    embeddings,
+                    project_name,
+                    shas,
+                )
+            await self._save_index()
+
+    async def remove_project(self, project_name: str) -> None:
+        """Remove every document of a project from the store."""
+        if not self._initialized:
+            await self.initialize()
+
+        async with self._writing():
+            files = self._project_files(project_name)
+            empty_files = list(self._empty_files.get(project_name, ()))
+            removed = await self._remove_positions(
+                [p for positions in files.values() for p in positions]
+            )
+            await self._update_empty_files(project_name, dict.fromkeys(empty_files))
+            if removed or empty_files:
+                await self._save_index()
 
     async def search(
         self,
@@ -116,85 +1101,412 @@ class FAISSVectorStore:
         k: int = 5,
         project_name: str | None = None,
         file_type: str | None = None,
+        mode: str = "auto",
+        mmr_lambda: float | None = None,
     ) -> list[dict[str, Any]]:
-        """Search for similar documents with optional metadata filtering."""
+        """Search for similar documents with optional metadata filtering.
+
+        ``mode`` selects ``vector``, ``lexical`` (BM25, no embedding call) or
+        ``hybrid`` retrieval, where both rankings are combined by reciprocal
+        rank fusion. ``auto`` answers identifier-like queries such as
+        function names, config keys or error names lexically and falls back
+        to hybrid search for prose or when nothing matches exactly.
+
+        The top candidates are diversified with Maximal Marginal Relevance, so
+        near-duplicate chunks (copies across repositories or branches,
+        sibling config files) do not crowd out other context. ``mmr_lambda``
+        trades relevance (1.0, which disables MMR) against diversity and
+        defaults to ``SEARCH_MMR_LAMBDA``.
+
+        Filters are applied inside the FAISS search through an ID selector
+        built from the metadata columns, so exactly ``k`` results are returned
+        whenever that many documents match. Results are cached per index
+        version, so a cached answer is never served after the index changed.
+        """
         if not self._initialized:
             await self.initialize()
 
-        if not self.documents or self.index is None:
+        if not self.documents or self.index is None or self.vectors is None:
             return []
 
-        query_embedding = await self._get_embeddings([query])
-        faiss.normalize_L2(query_embedding)
-
-        search_k = min(k * 10, len(self.documents))
-        distances, indices = self.index.search(query_embedding, search_k)
+        if mmr_lambda is None:
+            mmr_lambda = self.mmr_lambda
+        cache_key = (query, k, project_name, file_type, mode, mmr_lambda, self.version)
+        cached = self._search_results.get(cache_key)
+        if cached is not None:
+            return [dict(result) for result in cached]
 
         results: list[dict[str, Any]] = []
-        for dist, idx in zip(distances[0], indices[0]):
-            if idx == -1:
-                continue
+        if mode == "lexical" or (mode == "auto" and looks_like_identifier(query)):
+            results = await self._run_search(
+                query, None, k, project_name, file_type, True, mmr_lambda
+            )
+        if mode != "lexical" and not results:
+            query_embedding = await self._get_query_embedding(query)
+            results = await self._run_search(
+                query, query_embedding, k, project_name, file_type, mode != "vector", mmr_lambda
+            )
 
-            doc = self.documents[idx]
+        self._search_results.put(cache_key, results)
+        return [dict(result) for result in results]
 
-            if project_name and doc.project_name != project_name:
-                continue
-            if file_type and doc.file_type != file_type:
-                continue
+    async def _run_search(
+        self,
+        query: str,
+        query_embedding: np.ndarray | None,
+        k: int,
+        project_name: str | None,
+        file_type: str | None,
+        lexical: bool,
+        mmr_lambda: float,
+    ) -> list[dict[str, Any]]:
+        """Run :meth:`_search_index` on the thread pool while holding the state lock."""
+        async with self._state.read():
+            return await self._executor.run(
+                "search",
+                self._search_index,
+                query,
+                query_embedding,
+                k,
+                project_name,
+                file_type,
+                lexical,
+                mmr_lambda,
+            )
+
+    def _search_index(
+        self,
+        query: str,
+        query_embedding: np.ndarray | None,
+        k: int,
+        project_name: str | None,
+        file_type: str | None,
+        lexical: bool,
+        mmr_lambda: float,
+    ) -> list[dict[str, Any]]:
+        """Search the in-memory indexes.
+
+        Without a query embedding only BM25 is used; with one, vector search
+        runs alone or, if ``lexical`` is set, fused with BM25. With MMR
+        enabled a larger candidate pool is retrieved and diversified to ``k``.
+        """
+        mask = self._metadata.mask(project_name=project_name, file_type=file_type)
+        candidates = len(self.documents) if mask is None else int(np.count_nonzero(mask))
+        if candidates == 0:
+            return []
+
+        use_mmr = mmr_lambda < 1.0
+        pool = min(max(k * 4, 20), candidates)
+        wanted = pool if use_mmr else min(k, candidates)
+
+        if query_embedding is None:
+            hits = self.lexical.search(query, wanted, mask)
+        elif not lexical:
+            hits = self._vector_search(query_embedding, wanted, mask, candidates)
+        else:
+            vector_hits = self._vector_search(query_embedding, pool, mask, candidates)
+            lexical_hits = self.lexical.search(query, pool, mask)
+            hits = reciprocal_rank_fusion(
+                [position for position, _ in vector_hits],
+                [position for position, _ in lexical_hits],
+            )[:wanted]
+
+        if use_mmr and len(hits) > k:
+            hits = self._diversify(hits, query_embedding, k, mmr_lambda)
+
+        return [
+            {
+                **self.documents[position].to_dict(),
+                "score": score,
+            }
+            for position, score in hits
+        ]
+
+    def _diversify(
+        self,
+        hits: list[tuple[int, float]],
+        query_embedding: np.ndarray | None,
+        k: int,
+        mmr_lambda: float,
+    ) -> list[tuple[int, float]]:
+        """Pick ``k`` of the ranked hits by Maximal Marginal Relevance.
+
+        Relevance is the cosine similarity to the query, or the hit scores
+        scaled to ``[0, 1]`` for lexical-only searches without a query
+        embedding. The returned hits keep their original scores.
+        """
+        vectors = self._vectors_at(np.array([position for position, _ in hits]))
+        if query_embedding is not None:
+            relevance = vectors @ query_embedding[0]
+        else:
+            scores = np.array([score for _, score in hits], dtype=np.float32)
+            relevance = scores / scores.max() if scores.max() > 0 else scores
+        order = maximal_marginal_relevance(relevance, vectors, k, mmr_lambda)
+        return [hits[i] for i in order]
+
+    def _vectors_at(self, positions: np.ndarray) -> np.ndarray:
+        """Vectors at the given positions, exact when storage is compressed."""
+        positions = np.asarray(positions, dtype=np.int64)
+        if self._exact is not None:
+            return self._exact.get(positions)
+        return self.vectors.reconstruct_batch(positions)
+
+    def _vector_search(
+        self, query_embedding: np.ndarray, k: int, mask: np.ndarray | None, candidates: int
+    ) -> list[tuple[int, float]]:
+        """Nearest neighbours of the query embedding as ``(position, score)`` pairs."""
+        index = self.index
+        selector = None
+        if mask is not None:
+            if candidates < self.flat_threshold:
+                # Small filtered subsets are searched exactly, which is cheap
+                # and guarantees k hits whenever k documents match.
+                index = self.vectors
+            if index is self.vectors and (self._exact is not None or not supports_selector(index)):
+                return self._exact_search(query_embedding, np.flatnonzero(mask), k)
+            selector = bitmap_selector(mask)
+
+        fetch_k = k
+        if self._exact is not None and self.rerank_factor > 1:
+            fetch_k = min(k * self.rerank_factor, candidates)
 
-            results.append(
-                {
-                    **doc.to_dict(),
-                    "score": float(dist),
-                }
+        distances, indices = index.search(
+            query_embedding,
+            fetch_k,
+            params=search_parameters(index, self.target_recall, selector),
+        )
+        hits = [(int(idx), float(dist)) for dist, idx in zip(distances[0], indices[0]) if idx != -1]
+        if fetch_k > k:
+            hits = self._exact_search(
+                query_embedding, np.array([position for position, _ in hits]), k
             )
+        return hits
 
-            if len(results) >= k:
-                break
+    def _exact_search(
+        self, query_embedding: np.ndarray, positions: np.ndarray, k: int
+    ) -> list[tuple[int, float]]:
+        """Score the given positions exactly and return the top ``k``.
 
-        return results
+        Uses the original vectors when storage is compressed, which re-ranks
+        approximate candidates, and decoded vectors otherwise.
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        if not len(positions):
+            return []
+        scores = self._vectors_at(positions) @ query_embedding[0]
+        top = np.argsort(-scores, kind="stable")[:k]
+        return [(int(positions[i]), float(scores[i])) for i in top]
 
     async def clear(self) -> None:
         """Clear all documents from the store."""
-        self.index = faiss.IndexFlatIP(self.dimension)
-        self.documents = []
-        await self._save_index()
+        if not self._initialized:
+            await self.initialize()
+
+        async with self._writing():
+            seq = self._seq + 1
+            await self._executor.run("log_append", self._log.append_clear, seq)
+            self._seq = seq
+            async with self._state.write():
+                self._apply_clear()
+            await self._compact()
 
     async def get_stats(self) -> dict[str, Any]:
         """Get statistics about the vector store."""
         if not self._initialized:
             await self.initialize()
 
-        projects: set[str] = set()
-        file_types: set[str] = set()
+        async with self._state.read():
+            return {
+                "total_documents": len(self.documents),
+                "projects": list(self.catalog.project_counts),
+                "file_types": list(self.catalog.file_type_counts),
+                "documents_per_project": dict(self.catalog.project_counts),
+                "generation": self.generation,
+                "vector_storage": storage_type_of(self.vectors) if self.vectors else "float32",
+                "offloaded_calls": self._executor.get_stats(),
+                "embedding_failures": self.embedding_scheduler.failed_texts,
+            }
 
-        for doc in self.documents:
-            projects.add(doc.project_name)
-            file_types.add(doc.file_type)
+    async def _get_query_embedding(self, query: str) -> np.ndarray:
+        """Get the normalized embedding of a search query, using an LRU cache."""
+        cached = self._query_embeddings.get(query)
+        if cached is not None:
+            return cached
 
-        return {
-            "total_documents": len(self.documents),
-            "projects": list(projects),
-            "file_types": list(file_types),
-        }
+        embeddings = await self.embeddings.aembed_documents([query])
+        query_embedding = np.array(embeddings, dtype=np.float32)
+        await self._executor.run("normalize", faiss.normalize_L2, query_embedding)
+        self._query_embeddings.put(query, query_embedding)
+        return query_embedding
+
+    def _bump_version(self) -> None:
+        """Mark the index as changed, invalidating cached search results."""
+        self.version += 1
+        self._search_results.clear()
+
+    async def _get_embeddings(self, texts: list[str]) -> tuple[np.ndarray, list[int]]:
+        """Get embeddings for a list of texts.
 
-    async def _get_embeddings(self, texts: list[str]) -> np.ndarray:
-        """Get embeddings for a list of texts."""
-        embeddings = await self.embeddings.aembed_documents(texts)
-        return np.array(embeddings, dtype=np.float32)
+        Vectors are looked up in the persistent embedding cache by content
+        hash first; only distinct texts that miss are sent to the API.
+        Returns the vectors of the texts that could be embedded together
+        with their indices in ``texts``.
+        """
+        keys = [content_hash(text) for text in texts]
+        vectors = await self._executor.run("embedding_cache", self.embedding_cache.get_many, keys)
+
+        missing = {key: text for key, text in zip(keys, texts) if key not in vectors}
+        if missing:
+            embeddings = await self.embedding_scheduler.embed(list(missing.values()))
+            new_vectors = {
+                key: np.array(embedding, dtype=np.float32)
+                for key, embedding in zip(missing, embeddings)
+                if embedding is not None
+            }
+            await self._executor.run("embedding_cache", self.embedding_cache.put_many, new_vectors)
+            vectors.update(new_vectors)
+
+        embedded = [i for i, key in enumerate(keys) if key in vectors]
+        matrix = np.array([vectors[keys[i]] for i in embedded], dtype=np.float32)
+        return matrix.reshape(len(embedded), self.dimension), embedded
 
     async def _save_index(self) -> None:
-        """Save the index and documents to disk."""
-        if self.index is None:
+        """Compact the delta log into a snapshot once it has grown too large.
+
+        Must be called with ``_write_lock`` held. Mutations are already durable
+        in the log, so this only bounds replay time and log size instead of
+        rewriting every file on each change.
+        """
+        if self._log.size >= self.compaction_bytes:
+            await self._compact()
+
+    async def _compact(self, force: bool = False) -> None:
+        """Write the current state as a new snapshot and empty the delta log.
+
+        Snapshot files get sequence-numbered names and are written through a
+        temporary file, so a crash at any point leaves ``snapshot.json``
+        pointing at a complete snapshot and the log holding everything newer.
+        Documents and indexes are reloaded from the new files afterwards, so
+        their content no longer has to stay in memory and the index pages are
+        shared with other workers mapping the same snapshot. Searches continue
+        while the files are written. Unless ``force`` is set, nothing is
+        written when the last snapshot is still current. Must be called with
+        ``_write_lock`` held.
+        """
+        if self.vectors is None:
             return
+        storage_changed = await self._refresh_storage()
+        ann_rebuilt = await self._refresh_ann()
+        if (
+            not force
+            and self._seq == self._snapshot_seq
+            and self._log.size == 0
+            and not (ann_rebuilt or storage_changed)
+        ):
+            return
+
+        index_file, ann_file, docs_file, vectors_file = await self._executor.run(
+            "write_snapshot", self._write_snapshot
+        )
+        self._snapshot_seq = self._seq
+        documents = await self._executor.run("load_documents", self._load_documents, docs_file)
+        vectors = await self._executor.run("map_index", read_shared_index, index_file)
+        index = (
+            await self._executor.run("map_index", read_shared_index, ann_file)
+            if ann_file is not None
+            else vectors
+        )
+        async with self._state.write():
+            self.documents = documents
+            self.vectors = vectors
+            self.index = index
+            self._mapped = True
+            if vectors_file is not None:
+                self._exact = ExactVectors.open(vectors_file)
+
+    def _write_snapshot(self) -> tuple[Path, Path | None, Path, Path | None]:
+        """Write snapshot files and the manifest, then reset the delta log.
 
-        index_file = self.index_path / "index.faiss"
-        docs_file = self.index_path / "documents.pkl"
+        Returns the new index, search index, document and exact vector
+        files, the optional ones being ``None`` when not written.
+        """
+        index_file = self.index_path / f"index-{self._seq}.faiss"
+        docs_file = self.index_path / f"documents-{self._seq}.bin"
+        lexical_file = self.index_path / f"lexical-{self._seq}.npz"
+        ann_file = None
+        vectors_file = None
+
+        self._write_index(self.vectors, index_file)
+        if self._exact is not None:
+            vectors_file = self.index_path / f"vectors-{self._seq}.npy"
+            self._exact.save(vectors_file)
+        if self.index is not None and self.index is not self.vectors:
+            ann_file = self.index_path / f"ann-{self._seq}.faiss"
+            self._write_index(self.index, ann_file)
+        write_document_file(docs_file, self.documents, self.document_compression)
+        tmp_lexical_file = lexical_file.with_suffix(".tmp")
+        self.lexical.save(tmp_lexical_file)
+        fsync_file(tmp_lexical_file)
+        os.replace(tmp_lexical_file, lexical_file)
+
+        write_manifest(
+            self.index_path,
+            {
+                "seq": self._seq,
+                "embedding_model": self.embedding_model,
+                "index_file": index_file.name,
+                "documents_file": docs_file.name,
+                "lexical_file": lexical_file.name,
+                "ntotal": self.vectors.ntotal,
+                "ann_file": ann_file.name if ann_file else None,
+                "ann_trained_on": self._ann_trained_on,
+                "vectors_file": vectors_file.name if vectors_file else None,
+                "storage_trained_on": self._storage_trained_on,
+                "empty_files": self._empty_files,
+            },
+        )
+        self._log.reset()
+        keep = {index_file.name, docs_file.name, lexical_file.name}
+        for extra_file in (ann_file, vectors_file):
+            if extra_file:
+                keep.add(extra_file.name)
+        self._remove_stale_snapshots(self.index_path, keep)
+        return index_file, ann_file, docs_file, vectors_file
+
+    @staticmethod
+    def _write_index(index: faiss.Index, path: Path) -> None:
+        """Write a FAISS index through a temporary file and fsync it."""
+        tmp_path = path.with_suffix(".tmp")
+        faiss.write_index(index, str(tmp_path))
+        fsync_file(tmp_path)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _remove_stale_snapshots(directory: Path, keep: set[str]) -> None:
+        """Delete snapshot files in ``directory`` other than those in ``keep``."""
+        patterns = (
+            "index-*.faiss",
+            "ann-*.faiss",
+            "documents-*.bin",
+            "lexical-*.npz",
+            "vectors-*.npy",
+            "index.faiss",
+            "documents.bin",
+        )
+        for pattern in patterns:
+            for path in directory.glob(pattern):
+                if path.name not in keep:
+                    path.unlink(missing_ok=True)
+        (directory / "documents.pkl").unlink(missing_ok=True)
 
-        faiss.write_index(self.index, str(index_file))
-        with open(docs_file, "wb") as f:
-            docs_data = [doc.to_dict() for doc in self.documents]
-            pickle.dump(docs_data, f)
+    @staticmethod
+    def _load_documents(docs_file: Path) -> list[CodeDocument]:
+        """Open a document file and create lazily loaded documents for it."""
+        doc_file = DocumentFile(docs_file)
+        return [
+            CodeDocument(content="", content_loader=partial(doc_file.content, position), **data)
+            for position, data in enumerate(doc_file.iter_metadata())
+        ]
 
 
 _vector_store: FAISSVectorStore | None = None
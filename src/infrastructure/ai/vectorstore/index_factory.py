@@ -0,0 +1,200 @@
+"""Selection, construction and tuning of FAISS index types.
+
+The store keeps a flat index of every vector, aligned with the documents by
+position, either as raw float32 or in one of the compressed ``STORAGE_TYPES``.
+The ``INDEX_TYPES`` here are derived search structures built from it. All of
+them use inner product on normalized vectors, i.e. cosine similarity.
+"""
+
+import math
+from pathlib import Path
+from typing import Any
+
+import faiss
+import numpy as np
+
+INDEX_TYPES = ("flat", "ivf_flat", "hnsw", "ivf_sq8", "ivf_pq")
+STORAGE_TYPES = ("float32", "float16", "sq8", "pq")
+
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 80
+MIN_POINTS_PER_CENTROID = 39
+
+
+def choose_index_type(num_vectors: int, target_recall: float, flat_threshold: int) -> str:
+    """Pick an index type for a corpus size and target recall@k.
+
+    Small corpora stay exact. Above ``flat_threshold`` HNSW is used when high
+    recall is required, IVF-Flat for medium corpora, and the compressed
+    IVF-SQ8/IVF-PQ variants once memory starts to dominate.
+    """
+    if num_vectors < flat_threshold:
+        return "flat"
+    if target_recall >= 0.98:
+        return "hnsw"
+    if num_vectors < 10 * flat_threshold:
+        return "ivf_flat"
+    return "ivf_sq8" if target_recall >= 0.9 else "ivf_pq"
+
+
+def _nlist(num_vectors: int) -> int:
+    """Number of IVF lists, bounded so each centroid gets enough training points."""
+    nlist = int(4 * math.sqrt(num_vectors))
+    return max(1, min(nlist, num_vectors // MIN_POINTS_PER_CENTROID))
+
+
+def _pq_subquantizers(dimension: int) -> int:
+    """Largest PQ subquantizer count up to ``dimension / 8`` that divides it."""
+    for m in range(max(1, dimension // 8), 0, -1):
+        if dimension % m == 0:
+            return m
+    return 1
+
+
+def build_index(index_type: str, vectors: np.ndarray) -> faiss.Index:
+    """Build and, for IVF types, train an index over normalized vectors.
+
+    Vector ids are their row positions in ``vectors``.
+    """
+    num_vectors, dimension = vectors.shape
+    metric = faiss.METRIC_INNER_PRODUCT
+
+    if index_type == "flat":
+        index: faiss.Index = faiss.IndexFlatIP(dimension)
+    elif index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dimension, HNSW_M, metric)
+        index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+    elif index_type in ("ivf_flat", "ivf_sq8", "ivf_pq"):
+        quantizer = faiss.IndexFlatIP(dimension)
+        nlist = _nlist(num_vectors)
+        if index_type == "ivf_flat":
+            index = faiss.IndexIVFFlat(quantizer, dimension, nlist, metric)
+        elif index_type == "ivf_sq8":
+            index = faiss.IndexIVFScalarQuantizer(
+                quantizer, dimension, nlist, faiss.ScalarQuantizer.QT_8bit, metric
+            )
+        else:
+            index = faiss.IndexIVFPQ(
+                quantizer,
+                dimension,
+                nlist,
+                _pq_subquantizers(dimension),
+                _pq_bits(num_vectors),
+                metric,
+            )
+        index.train(vectors)
+    else:
+        raise ValueError(f"Unknown index type: {index_type}")
+
+    if num_vectors:
+        index.add(vectors)
+    return index
+
+
+def _pq_bits(num_vectors: int) -> int:
+    """Bits per PQ code, lowered for corpora too small to train 256 centroids."""
+    return 8 if num_vectors >= 256 * MIN_POINTS_PER_CENTROID else 4
+
+
+def build_vector_storage(storage_type: str, vectors: np.ndarray) -> faiss.Index:
+    """Build the positional flat index holding every vector in ``storage_type``.
+
+    All storage types compact ids on ``remove_ids`` like ``IndexFlatIP``, so
+    positions stay aligned with the documents. ``sq8`` and ``pq`` are trained
+    on ``vectors``; vectors added later are encoded with that training.
+    """
+    num_vectors, dimension = vectors.shape
+    metric = faiss.METRIC_INNER_PRODUCT
+
+    if storage_type == "float32":
+        index: faiss.Index = faiss.IndexFlatIP(dimension)
+    elif storage_type == "float16":
+        index = faiss.IndexScalarQuantizer(dimension, faiss.ScalarQuantizer.QT_fp16, metric)
+    elif storage_type == "sq8":
+        index = faiss.IndexScalarQuantizer(dimension, faiss.ScalarQuantizer.QT_8bit, metric)
+    elif storage_type == "pq":
+        index = faiss.IndexPQ(
+            dimension, _pq_subquantizers(dimension), _pq_bits(num_vectors), metric
+        )
+    else:
+        raise ValueError(f"Unknown vector storage type: {storage_type}")
+
+    if not index.is_trained:
+        index.train(vectors)
+    if num_vectors:
+        index.add(vectors)
+    return index
+
+
+def storage_type_of(index: faiss.Index) -> str:
+    """Storage type of a positional flat index loaded from disk."""
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexPQ):
+        return "pq"
+    if isinstance(index, faiss.IndexScalarQuantizer):
+        if index.sq.qtype == faiss.ScalarQuantizer.QT_fp16:
+            return "float16"
+        return "sq8"
+    return "float32"
+
+
+def supports_selector(index: faiss.Index) -> bool:
+    """Whether searches on ``index`` accept an ID selector in their parameters."""
+    return not isinstance(faiss.downcast_index(index), faiss.IndexPQ)
+
+
+def index_type_of(index: faiss.Index) -> str:
+    """Name of the index type of an index loaded from disk."""
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(index, faiss.IndexIVFPQ):
+        return "ivf_pq"
+    if isinstance(index, faiss.IndexIVFScalarQuantizer):
+        return "ivf_sq8"
+    if isinstance(index, faiss.IndexIVF):
+        return "ivf_flat"
+    return "flat"
+
+
+def search_parameters(
+    index: faiss.Index, target_recall: float, selector: Any | None = None
+) -> faiss.SearchParameters | None:
+    """Search-time parameters tuned for ``target_recall``, with an optional ID selector.
+
+    Returns ``None`` for indexes that take no search parameters at all.
+    """
+    index = faiss.downcast_index(index)
+    if not supports_selector(index):
+        if selector is not None:
+            raise ValueError(f"{type(index).__name__} does not support ID selectors")
+        return None
+    if isinstance(index, faiss.IndexHNSW):
+        params: faiss.SearchParameters = faiss.SearchParametersHNSW()
+        params.efSearch = 128 if target_recall >= 0.98 else 64 if target_recall >= 0.9 else 32
+    elif isinstance(index, faiss.IndexIVF):
+        fraction = 0.25 if target_recall >= 0.98 else 0.1 if target_recall >= 0.9 else 0.05
+        params = faiss.SearchParametersIVF()
+        params.nprobe = max(1, min(index.nlist, math.ceil(index.nlist * fraction)))
+    else:
+        params = faiss.SearchParameters()
+    if selector is not None:
+        params.sel = selector
+        # SWIG does not keep the selector alive through ``sel``.
+        params.selector = selector
+    return params
+
+
+def read_shared_index(path: Path) -> faiss.Index:
+    """Read an index with its vector codes memory-mapped from ``path``.
+
+    Processes mapping the same file share its pages through the page cache
+    instead of each holding a private copy. A mapped index must not be added
+    to or removed from; mutate an :func:`owned_copy` instead.
+    """
+    return faiss.read_index(str(path), faiss.IO_FLAG_MMAP_IFC)
+
+
+def owned_copy(index: faiss.Index) -> faiss.Index:
+    """Copy an index, including memory-mapped codes, into private memory."""
+    return faiss.deserialize_index(faiss.serialize_index(index))
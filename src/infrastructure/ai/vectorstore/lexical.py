@@ -0,0 +1,167 @@
+"""In-process BM25 index with code-aware tokenization."""
+
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"[A-Za-z0-9_]+")
+CAMEL_PATTERN = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+")
+IDENTIFIER_QUERY = re.compile(r"^[\w.:/()\[\]<>-]+$")
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+RRF_K = 60
+
+
+def tokenize(text: str) -> list[str]:
+    """Split text into lowercase terms, expanding camelCase and snake_case.
+
+    Each identifier yields itself plus its parts, so ``getUserName`` matches
+    queries for ``getusername`` as well as ``user`` or ``name``.
+    """
+    terms: list[str] = []
+    for word in TOKEN_PATTERN.findall(text):
+        lower = word.lower()
+        terms.append(lower)
+        parts = [p.lower() for piece in word.split("_") for p in CAMEL_PATTERN.findall(piece)]
+        if len(parts) > 1:
+            terms.extend(parts)
+    return terms
+
+
+def looks_like_identifier(query: str) -> bool:
+    """Whether a query is an exact identifier, key or error name rather than prose.
+
+    Such queries are best served by lexical search alone.
+    """
+    query = query.strip().strip("`'\"")
+    if not query or not IDENTIFIER_QUERY.match(query):
+        return False
+    return (
+        any(c in query for c in "_.:(") or query.isupper() or bool(re.search(r"[a-z][A-Z]", query))
+    )
+
+
+def reciprocal_rank_fusion(*rankings: list[int], k: int = RRF_K) -> list[tuple[int, float]]:
+    """Fuse ranked lists of document positions by reciprocal rank."""
+    scores: dict[int, float] = {}
+    for ranking in rankings:
+        for rank, position in enumerate(ranking):
+            scores[position] = scores.get(position, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+class BM25Index:
+    """Inverted index over documents addressed by their index position.
+
+    Postings are numpy arrays per term so scoring a query is a handful of
+    vectorized operations, and removals can renumber positions in bulk the
+    same way ``IndexFlat.remove_ids`` does.
+    """
+
+    def __init__(self) -> None:
+        self.doc_lengths = np.zeros(0, dtype=np.float32)
+        self._postings: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def clear(self) -> None:
+        """Drop all documents."""
+        self.doc_lengths = np.zeros(0, dtype=np.float32)
+        self._postings = {}
+
+    def add(self, texts: Iterable[str]) -> None:
+        """Index texts appended after the current last position."""
+        start = len(self.doc_lengths)
+        lengths: list[int] = []
+        batch: dict[str, tuple[list[int], list[int]]] = {}
+        for offset, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                positions, tfs = batch.setdefault(term, ([], []))
+                positions.append(start + offset)
+                tfs.append(tf)
+
+        self.doc_lengths = np.concatenate([self.doc_lengths, np.array(lengths, dtype=np.float32)])
+        for term, (positions, tfs) in batch.items():
+            new_positions = np.array(positions, dtype=np.int32)
+            new_tfs = np.array(tfs, dtype=np.float32)
+            if term in self._postings:
+                old_positions, old_tfs = self._postings[term]
+                new_positions = np.concatenate([old_positions, new_positions])
+                new_tfs = np.concatenate([old_tfs, new_tfs])
+            self._postings[term] = (new_positions, new_tfs)
+
+    def remove(self, positions: np.ndarray) -> None:
+        """Remove documents and shift later positions down to stay aligned."""
+        removed = np.sort(np.asarray(positions, dtype=np.int64))
+        keep = np.ones(len(self.doc_lengths), dtype=bool)
+        keep[removed] = False
+        self.doc_lengths = self.doc_lengths[keep]
+
+        for term in list(self._postings):
+            term_positions, tfs = self._postings[term]
+            alive = keep[term_positions]
+            if not alive.any():
+                del self._postings[term]
+                continue
+            term_positions = term_positions[alive]
+            shift = np.searchsorted(removed, term_positions)
+            self._postings[term] = ((term_positions - shift).astype(np.int32), tfs[alive])
+
+    def search(self, query: str, k: int, mask: np.ndarray | None = None) -> list[tuple[int, float]]:
+        """Top ``k`` ``(position, bm25 score)`` pairs, optionally restricted to ``mask``."""
+        num_docs = len(self.doc_lengths)
+        if num_docs == 0:
+            return []
+
+        avg_length = float(self.doc_lengths.mean()) or 1.0
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths / avg_length)
+        scores = np.zeros(num_docs, dtype=np.float32)
+        for term in set(tokenize(query)):
+            if term not in self._postings:
+                continue
+            positions, tfs = self._postings[term]
+            idf = np.log(1 + (num_docs - len(positions) + 0.5) / (len(positions) + 0.5))
+            scores[positions] += idf * tfs * (BM25_K1 + 1) / (tfs + norm[positions])
+
+        if mask is not None:
+            scores[~mask] = 0
+        matches = np.flatnonzero(scores)
+        if len(matches) > k:
+            matches = matches[np.argpartition(-scores[matches], k - 1)[:k]]
+        ranked = matches[np.argsort(-scores[matches], kind="stable")]
+        return [(int(position), float(scores[position])) for position in ranked]
+
+    def save(self, path: Path) -> None:
+        """Write the index as a single ``.npz`` file."""
+        terms = list(self._postings)
+        lengths = np.array([len(self._postings[t][0]) for t in terms], dtype=np.int64)
+        empty_i, empty_f = np.zeros(0, np.int32), np.zeros(0, np.float32)
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                terms=np.array("\n".join(terms)),
+                lengths=lengths,
+                positions=np.concatenate([self._postings[t][0] for t in terms] or [empty_i]),
+                tfs=np.concatenate([self._postings[t][1] for t in terms] or [empty_f]),
+                doc_lengths=self.doc_lengths,
+            )
+
+    @classmethod
+    def load(cls, path: Path) -> "BM25Index":
+        """Read an index written by :meth:`save`."""
+        index = cls()
+        with np.load(path) as data:
+            index.doc_lengths = data["doc_lengths"]
+            terms = str(data["terms"]).split("\n") if len(data["lengths"]) else []
+            bounds = np.concatenate([[0], np.cumsum(data["lengths"])])
+            positions, tfs = data["positions"], data["tfs"]
+            for term, start, end in zip(terms, bounds[:-1], bounds[1:]):
+                index._postings[term] = (positions[start:end], tfs[start:end])
+        return index
@@ -0,0 +1,165 @@
+"""Metadata indexes over the stored documents.
+
+``MetadataColumns`` pre-filters vector searches; ``FileCatalog`` answers file
+listings and path lookups without scanning the documents.
+"""
+
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Iterable
+
+import faiss
+import numpy as np
+
+
+class MetadataColumns:
+    """Per-document project and file type codes, aligned with index positions.
+
+    Each distinct value is mapped to a small integer code so a filter becomes
+    a vectorized comparison producing a bitmap that FAISS can search within.
+    """
+
+    FIELDS = ("project_name", "file_type")
+
+    def __init__(self) -> None:
+        self._codes: dict[str, dict[str, int]] = {}
+        self._columns: dict[str, np.ndarray] = {}
+        self.clear()
+
+    def clear(self) -> None:
+        """Drop all metadata."""
+        self._codes = {name: {} for name in self.FIELDS}
+        self._columns = {name: np.zeros(0, dtype=np.int32) for name in self.FIELDS}
+
+    def rebuild(self, documents: Iterable[Any]) -> None:
+        """Recompute all columns from scratch."""
+        self.clear()
+        self.append(documents)
+
+    def append(self, documents: Iterable[Any]) -> None:
+        """Append the metadata of documents added at the end of the index."""
+        documents = list(documents)
+        for name, codes in self._codes.items():
+            new = np.fromiter(
+                (codes.setdefault(getattr(doc, name), len(codes)) for doc in documents),
+                dtype=np.int32,
+                count=len(documents),
+            )
+            self._columns[name] = np.concatenate([self._columns[name], new])
+
+    def mask(self, **filters: str | None) -> np.ndarray | None:
+        """Get a boolean mask of documents matching all given filters.
+
+        Returns ``None`` when no filter is set, meaning every document matches.
+        """
+        mask: np.ndarray | None = None
+        for name, value in filters.items():
+            if not value:
+                continue
+            code = self._codes[name].get(value)
+            column = self._columns[name]
+            matches = column == code if code is not None else np.zeros(len(column), dtype=bool)
+            mask = matches if mask is None else mask & matches
+        return mask
+
+
+@dataclass
+class _SuffixNode:
+    """Trie node keyed by path components from the file name upwards."""
+
+    children: dict[str, "_SuffixNode"] = field(default_factory=dict)
+    paths: set[str] = field(default_factory=set)
+
+
+@dataclass
+class ProjectFiles:
+    """Files of one project with the index positions of their chunks."""
+
+    name: str
+    positions: dict[str, list[int]] = field(default_factory=dict)
+    file_types: dict[str, str] = field(default_factory=dict)
+    suffixes: _SuffixNode = field(default_factory=_SuffixNode)
+
+    def add(self, path: str, file_type: str, position: int) -> None:
+        if path not in self.positions:
+            self.positions[path] = []
+            self.file_types[path] = file_type
+            node = self.suffixes
+            for part in reversed(path.split("/")):
+                node = node.children.setdefault(part, _SuffixNode())
+                node.paths.add(path)
+        self.positions[path].append(position)
+
+    def resolve(self, path: str) -> str | None:
+        """Find the indexed path matching ``path`` exactly or by its trailing components.
+
+        ``path`` may also carry extra leading components, e.g. the repository
+        name, which are dropped until a match is found.
+        """
+        parts = [part for part in path.strip("/").split("/") if part]
+        for start in range(len(parts)):
+            if "/".join(parts[start:]) in self.positions:
+                return "/".join(parts[start:])
+            node: _SuffixNode | None = self.suffixes
+            for part in reversed(parts[start:]):
+                node = node.children.get(part)
+                if node is None:
+                    break
+            if node is not None:
+                return min(node.paths, key=lambda p: (len(p), p))
+        return None
+
+
+class FileCatalog:
+    """Write-time indexes from projects and paths to document positions.
+
+    Projects are keyed case-insensitively. Each project maps its paths to
+    chunk positions and keeps a trie of path suffixes, so listing a project
+    or resolving a partial path does not depend on the corpus size. Document
+    counts per project and file type are kept as running counters.
+    """
+
+    def __init__(self) -> None:
+        self._projects: dict[str, ProjectFiles] = {}
+        self.project_counts: Counter[str] = Counter()
+        self.file_type_counts: Counter[str] = Counter()
+        self.size = 0
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        self._projects = {}
+        self.project_counts = Counter()
+        self.file_type_counts = Counter()
+        self.size = 0
+
+    def rebuild(self, documents: Iterable[Any]) -> None:
+        """Recompute the catalog from scratch, e.g. after positions shifted."""
+        self.clear()
+        self.append(documents)
+
+    def append(self, documents: Iterable[Any]) -> None:
+        """Register documents added at the end of the index."""
+        for doc in documents:
+            project = self._projects.get(doc.project_name.lower())
+            if project is None:
+                project = self._projects[doc.project_name.lower()] = ProjectFiles(doc.project_name)
+            project.add(doc.file_path, doc.file_type, self.size)
+            self.project_counts[doc.project_name] += 1
+            self.file_type_counts[doc.file_type] += 1
+            self.size += 1
+
+    def project(self, project_name: str) -> ProjectFiles | None:
+        """Get the files of a project by case-insensitive name."""
+        return self._projects.get(project_name.lower())
+
+
+def bitmap_selector(mask: np.ndarray) -> faiss.IDSelectorBitmap:
+    """Build a FAISS ID selector that restricts a search to ``mask``.
+
+    The bitmap is attached to the selector so it outlives the pointer the
+    selector holds into it.
+    """
+    bitmap = np.packbits(mask, bitorder="little")
+    selector = faiss.IDSelectorBitmap(len(mask), faiss.swig_ptr(bitmap))
+    selector.bitmap_array = bitmap
+    return selector
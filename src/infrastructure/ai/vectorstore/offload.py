@@ -0,0 +1,84 @@
+"""Bounded thread pool for blocking vector store work."""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass
+class CallStats:
+    """Timing of the offloaded calls of one kind."""
+
+    calls: int = 0
+    queue_seconds: float = 0.0
+    run_seconds: float = 0.0
+    max_run_seconds: float = 0.0
+
+    def to_dict(self) -> dict[str, float]:
+        return {
+            "calls": self.calls,
+            "avg_queue_ms": 1000 * self.queue_seconds / self.calls if self.calls else 0.0,
+            "avg_run_ms": 1000 * self.run_seconds / self.calls if self.calls else 0.0,
+            "max_run_ms": 1000 * self.max_run_seconds,
+        }
+
+
+class BlockingExecutor:
+    """Run CPU- and disk-bound calls on worker threads instead of the event loop.
+
+    At most ``max_workers + max_queue`` calls are admitted at once; further
+    callers wait on the event loop, so a burst of searches or writes applies
+    backpressure instead of piling up unbounded work. With ``max_workers=0``
+    calls run inline on the loop, which is only useful for comparison.
+
+    Every call is timed under its ``name``: queue time is spent waiting for a
+    worker, run time is spent in the call itself.
+    """
+
+    def __init__(self, max_workers: int = 4, max_queue: int = 64) -> None:
+        self.max_workers = max_workers
+        self._pool = (
+            ThreadPoolExecutor(max_workers, thread_name_prefix="vectorstore")
+            if max_workers > 0
+            else None
+        )
+        self._slots = asyncio.Semaphore(max(1, max_workers) + max_queue)
+        self.stats: dict[str, CallStats] = {}
+
+    async def run(self, name: str, func: Callable[..., T], *args: Any) -> T:
+        """Run ``func(*args)`` on a worker thread and return its result."""
+        async with self._slots:
+            submitted = time.perf_counter()
+            if self._pool is None:
+                result, started, finished = self._timed(func, args)
+            else:
+                loop = asyncio.get_running_loop()
+                result, started, finished = await loop.run_in_executor(
+                    self._pool, self._timed, func, args
+                )
+
+        stats = self.stats.setdefault(name, CallStats())
+        stats.calls += 1
+        stats.queue_seconds += started - submitted
+        stats.run_seconds += finished - started
+        stats.max_run_seconds = max(stats.max_run_seconds, finished - started)
+        return result
+
+    def get_stats(self) -> dict[str, dict[str, float]]:
+        """Timing per call name."""
+        return {name: stats.to_dict() for name, stats in sorted(self.stats.items())}
+
+    def shutdown(self) -> None:
+        """Stop the worker threads after pending calls finish."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+
+    @staticmethod
+    def _timed(func: Callable[..., T], args: tuple[Any, ...]) -> tuple[T, float, float]:
+        started = time.perf_counter()
+        result = func(*args)
+        return result, started, time.perf_counter()
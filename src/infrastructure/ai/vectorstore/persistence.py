@@ -0,0 +1,269 @@
+"""Crash-safe persistence for the vector store: snapshots plus a delta log.
+
+Every mutation is appended to ``delta.log`` and fsynced before it is applied
+in memory. From time to time the in-memory state is compacted into a new
+snapshot, whose files are written under sequence-numbered names and only
+become visible when ``snapshot.json`` is atomically replaced to point at
+them. On startup the current snapshot is loaded and the log records newer
+than it are replayed.
+
+Several worker processes may serve the same index directory. Writes are
+serialized across them by an exclusive lock on ``writer.lock``, and every
+write ends by replacing the ``version`` file, which readers poll to know when
+to pick up new snapshots and log records.
+
+Full rebuilds go into a new generation, a subdirectory with its own
+snapshots and log. ``generations.json`` names the generation readers serve
+and the previous one, kept for rollback. Without it the index directory
+itself holds the only generation, named ``""``.
+
+Log record layout (little-endian)::
+
+    u32 payload length | u32 crc32 of payload | payload
+
+    payload = u64 seq | u8 op | op-specific body
+        add:    u32 json length | json list of document dicts | float32 vectors
+        remove: int64 positions
+        clear:  empty
+        files:  json {"project": name, "shas": {path: blob sha or null}}
+"""
+
+import fcntl
+import json
+import os
+import struct
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterator
+
+import numpy as np
+
+OP_ADD = 1
+OP_REMOVE = 2
+OP_CLEAR = 3
+OP_FILES = 4
+
+RECORD_HEADER = struct.Struct("<II")
+PAYLOAD_HEADER = struct.Struct("<QB")
+
+
+@dataclass
+class LogRecord:
+    """A single mutation read back from the delta log."""
+
+    seq: int
+    op: int
+    documents: list[dict[str, Any]] = field(default_factory=list)
+    vectors: np.ndarray | None = None
+    positions: np.ndarray | None = None
+    project_name: str = ""
+    shas: dict[str, str | None] = field(default_factory=dict)
+
+
+class DeltaLog:
+    """Append-only log of vector store mutations."""
+
+    def __init__(self, path: Path, dimension: int) -> None:
+        self.path = path
+        self.dimension = dimension
+
+    @property
+    def size(self) -> int:
+        """Current size of the log in bytes."""
+        return self.path.stat().st_size if self.path.exists() else 0
+
+    def append_add(self, seq: int, documents: list[dict[str, Any]], vectors: np.ndarray) -> None:
+        """Log documents added at the end of the index with their vectors."""
+        doc_json = json.dumps(documents).encode("utf-8")
+        body = (
+            struct.pack("<I", len(doc_json))
+            + doc_json
+            + np.ascontiguousarray(vectors, dtype=np.float32).tobytes()
+        )
+        self._append(seq, OP_ADD, body)
+
+    def append_remove(self, seq: int, positions: np.ndarray) -> None:
+        """Log the removal of documents at the given index positions."""
+        self._append(seq, OP_REMOVE, np.asarray(positions, dtype=np.int64).tobytes())
+
+    def append_clear(self, seq: int) -> None:
+        """Log that every document was removed."""
+        self._append(seq, OP_CLEAR, b"")
+
+    def append_files(self, seq: int, project_name: str, shas: dict[str, str | None]) -> None:
+        """Log blob SHAs of files indexed without chunks; ``None`` forgets a path."""
+        body = json.dumps({"project": project_name, "shas": shas}).encode("utf-8")
+        self._append(seq, OP_FILES, body)
+
+    def replay(self, after_seq: int, repair: bool = True) -> Iterator[LogRecord]:
+        """Yield records newer than ``after_seq``.
+
+        A torn or corrupted record at the end of the log, left by a crash
+        during an append, is truncated away together with everything after it
+        when ``repair`` is set. Readers that do not hold the writer lock only
+        stop there, since the record may still be being written.
+        """
+        if not self.path.exists():
+            return
+
+        with open(self.path, "rb") as f:
+            data = f.read()
+
+        offset = 0
+        while offset + RECORD_HEADER.size <= len(data):
+            length, crc = RECORD_HEADER.unpack_from(data, offset)
+            start = offset + RECORD_HEADER.size
+            payload = data[start : start + length]
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                break
+            offset = start + length
+
+            record = self._decode(payload)
+            if record.seq > after_seq:
+                yield record
+
+        if repair and offset < len(data):
+            print(f"Truncating {len(data) - offset} bytes of torn delta log records")
+            with open(self.path, "r+b") as f:
+                f.truncate(offset)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def reset(self) -> None:
+        """Empty the log once its records are covered by a snapshot."""
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def _append(self, seq: int, op: int, body: bytes) -> None:
+        payload = PAYLOAD_HEADER.pack(seq, op) + body
+        with open(self.path, "ab") as f:
+            f.write(RECORD_HEADER.pack(len(payload), zlib.crc32(payload)))
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _decode(self, payload: bytes) -> LogRecord:
+        seq, op = PAYLOAD_HEADER.unpack_from(payload, 0)
+        body = payload[PAYLOAD_HEADER.size :]
+        if op == OP_ADD:
+            (json_length,) = struct.unpack_from("<I", body, 0)
+            documents = json.loads(body[4 : 4 + json_length])
+            vectors = np.frombuffer(body[4 + json_length :], dtype=np.float32)
+            return LogRecord(
+                seq=seq,
+                op=op,
+                documents=documents,
+                vectors=vectors.reshape(len(documents), self.dimension),
+            )
+        if op == OP_REMOVE:
+            return LogRecord(seq=seq, op=op, positions=np.frombuffer(body, dtype=np.int64))
+        if op == OP_FILES:
+            files = json.loads(body)
+            return LogRecord(seq=seq, op=op, project_name=files["project"], shas=files["shas"])
+        return LogRecord(seq=seq, op=op)
+
+
+def read_manifest(index_path: Path) -> dict[str, Any] | None:
+    """Read ``snapshot.json``, or ``None`` if no snapshot was written yet."""
+    manifest_file = index_path / "snapshot.json"
+    if not manifest_file.exists():
+        return None
+    with open(manifest_file, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_manifest(index_path: Path, manifest: dict[str, Any]) -> None:
+    """Atomically point ``snapshot.json`` at a fully written snapshot."""
+    _write_json(index_path / "snapshot.json", manifest)
+
+
+def read_generations(root: Path) -> dict[str, Any]:
+    """Read ``generations.json``, defaulting to the index directory itself."""
+    generations_file = root / "generations.json"
+    if not generations_file.exists():
+        return {"current": "", "previous": None}
+    with open(generations_file, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_generations(root: Path, current: str, previous: str | None) -> None:
+    """Atomically switch the generation readers serve."""
+    _write_json(root / "generations.json", {"current": current, "previous": previous})
+
+
+def _write_json(path: Path, data: dict[str, Any]) -> None:
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+    dir_fd = os.open(path.parent, os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+
+def fsync_file(path: Path) -> None:
+    """Flush a file written by a library that does not fsync itself."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class WriterLock:
+    """Exclusive lock serializing writers across processes sharing an index."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._fd: int | None = None
+
+    def acquire(self) -> None:
+        """Block until no other process holds the lock."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        except BaseException:
+            os.close(fd)
+            raise
+        self._fd = fd
+
+    def release(self) -> None:
+        """Release the lock."""
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+
+
+def read_version(index_path: Path) -> str:
+    """Read the version last published by a writer, or ``""`` if none was."""
+    try:
+        return (index_path / "version").read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return ""
+
+
+def write_version(index_path: Path, generation: str, seq: int, snapshot_seq: int) -> str:
+    """Atomically publish the state a writer left the index in.
+
+    The version changes whenever a log record or snapshot is written or the
+    generation is switched, so readers only need to compare it with the last
+    one they saw.
+    """
+    version = f"{generation} {seq} {snapshot_seq}"
+    version_file = index_path / "version"
+    tmp_path = version_file.with_suffix(".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(tmp_path, version_file)
+    return version
@@ -0,0 +1,54 @@
+"""Readers-writer lock for the in-memory state of the vector store."""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+
+class RWLock:
+    """An asyncio lock held by any number of readers or by one writer.
+
+    Writers are preferred: once a writer waits, new readers queue behind it,
+    so a steady stream of searches cannot starve index updates. Writers are
+    expected to hold the lock only while swapping in-memory state, not for
+    the I/O or embedding work leading up to it.
+    """
+
+    def __init__(self) -> None:
+        self._condition = asyncio.Condition()
+        self._readers = 0
+        self._writing = False
+        self._waiting_writers = 0
+
+    @asynccontextmanager
+    async def read(self) -> AsyncIterator[None]:
+        """Hold the lock shared with other readers."""
+        async with self._condition:
+            await self._condition.wait_for(lambda: not self._writing and not self._waiting_writers)
+            self._readers += 1
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self._readers -= 1
+                if not self._readers:
+                    self._condition.notify_all()
+
+    @asynccontextmanager
+    async def write(self) -> AsyncIterator[None]:
+        """Hold the lock exclusively."""
+        async with self._condition:
+            self._waiting_writers += 1
+            try:
+                await self._condition.wait_for(lambda: not self._writing and not self._readers)
+            finally:
+                self._waiting_writers -= 1
+                # A cancelled writer may have been the one holding readers back.
+                self._condition.notify_all()
+            self._writing = True
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self._writing = False
+                self._condition.notify_all()
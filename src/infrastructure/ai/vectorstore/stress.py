@@ -0,0 +1,192 @@
+"""Stress test of concurrent searches while the vector store is being written.
+
+Runs against a throw-away index with the local hashing embeddings::
+
+    python -m src.infrastructure.ai.vectorstore.stress
+
+Every chunk embeds the project and path it belongs to in its content, so a
+search result whose metadata does not match its content reveals an index
+and document list that were read out of step. Re-indexing keeps the number
+of files per project, so a search within a project that returns fewer hits
+than the same search did before reveals files missing mid-write.
+"""
+
+import asyncio
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+from src.infrastructure.ai.vectorstore.faiss_store import CodeDocument, FAISSVectorStore
+from src.infrastructure.config.settings import get_settings
+
+SEARCH_MODES = ("auto", "vector", "lexical", "hybrid")
+
+
+def make_documents(project: str, num_files: int, revision: int) -> list[CodeDocument]:
+    """One single-chunk file per index, tagged with its project, path and revision."""
+    documents = []
+    for i in range(num_files):
+        file_name = f"module_{i}.py"
+        content = (
+            f"# project={project} path=src/{file_name} revision={revision}\n"
+            f"def handler_{i}(request):\n"
+            f"    return process_{project}_{i}(request, revision={revision})\n"
+        )
+        documents.append(
+            CodeDocument(
+                content=content,
+                project_name=project,
+                folder_path="src",
+                file_name=file_name,
+                file_type=".py",
+                file_url=f"https://example.com/{project}/src/{file_name}",
+                start_line=1,
+                end_line=3,
+                blob_sha=f"{project}-{i}-{revision}",
+            )
+        )
+    return documents
+
+
+def check_result(result: dict[str, Any], project_name: str | None) -> str | None:
+    """Describe what is wrong with a search result, or ``None`` if it is consistent."""
+    path = f"{result['folder_path']}/{result['file_name']}"
+    marker = f"project={result['project_name']} path={path} "
+    if marker not in result["content"]:
+        return f"content of {result['project_name']}/{path} belongs to another document"
+    if project_name is not None and result["project_name"] != project_name:
+        return f"result from {result['project_name']} for a search in {project_name}"
+    return None
+
+
+async def stress_test(
+    store: FAISSVectorStore,
+    num_projects: int = 6,
+    files_per_project: int = 50,
+    rounds: int = 4,
+    searchers: int = 8,
+    seed: int = 0,
+) -> dict[str, Any]:
+    """Run searches continuously while projects are re-indexed, removed and rebuilt.
+
+    Each round replaces every file of every project, removes and re-adds one
+    project and compacts; one round rebuilds everything into a shadow
+    generation and swaps it in. Returns search counts, consistency failures
+    and search latency percentiles.
+
+    Searches within a project are also checked to return at least as many
+    hits as the same search did before, except while that project is
+    removed and re-added.
+    """
+    rng = random.Random(seed)
+    projects = [f"project{p}" for p in range(num_projects)]
+    writing = True
+    latencies: list[float] = []
+    failures: list[str] = []
+    errors: list[str] = []
+    # Most hits seen per (query, project, mode), and the project being
+    # removed and re-added with a counter of such rounds.
+    hits: dict[tuple[str, str, str], int] = {}
+    removing: str | None = None
+    removals = 0
+
+    for project in projects:
+        await store.add_documents(make_documents(project, files_per_project, 0))
+
+    async def searcher() -> None:
+        while writing:
+            project = rng.choice(projects)
+            i = rng.randrange(files_per_project)
+            query = rng.choice([f"handler_{i}", f"process_{project}_{i} request", "revision"])
+            project_name = rng.choice([project, None])
+            mode = rng.choice(SEARCH_MODES)
+            removals_before = removals
+            stable = removing != project
+            started = time.perf_counter()
+            try:
+                results = await store.search(query, k=5, project_name=project_name, mode=mode)
+            except Exception as e:
+                errors.append(f"{type(e).__name__}: {e}")
+                continue
+            latencies.append(time.perf_counter() - started)
+            for result in results:
+                failure = check_result(result, project_name)
+                if failure:
+                    failures.append(failure)
+
+            if project_name is None or not stable or removals != removals_before:
+                continue
+            key = (query, project_name, mode)
+            if len(results) < hits.get(key, 0):
+                failures.append(
+                    f"{len(results)} hits for {query!r} in {project_name} ({mode}), "
+                    f"{hits[key]} before"
+                )
+            hits[key] = max(hits.get(key, 0), len(results))
+
+    async def writer() -> None:
+        nonlocal writing, removing, removals
+        try:
+            for revision in range(1, rounds + 1):
+                if revision == rounds // 2 + 1:
+                    shadow = await store.shadow()
+                    for project in projects:
+                        await shadow.add_documents(
+                            make_documents(project, files_per_project, revision)
+                        )
+                    await store.swap(shadow)
+                    continue
+                for project in projects:
+                    await store.replace_files(
+                        project, make_documents(project, files_per_project, revision)
+                    )
+                removing = rng.choice(projects)
+                removals += 1
+                await store.remove_project(removing)
+                await store.add_documents(make_documents(removing, files_per_project, revision))
+                removing = None
+                await store.compact()
+        finally:
+            writing = False
+
+    started = time.perf_counter()
+    await asyncio.gather(writer(), *(searcher() for _ in range(searchers)))
+    elapsed = time.perf_counter() - started
+
+    latencies_ms = sorted(1000 * latency for latency in latencies) or [0.0]
+    return {
+        "seconds": elapsed,
+        "searches": len(latencies),
+        "inconsistent_results": len(failures),
+        "errors": len(errors),
+        "mean_ms": statistics.fmean(latencies_ms),
+        "p99_ms": latencies_ms[min(len(latencies_ms) - 1, int(0.99 * len(latencies_ms)))],
+        "max_ms": latencies_ms[-1],
+        "examples": (errors + failures)[:5],
+    }
+
+
+async def main() -> int:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        settings = get_settings().model_copy(
+            update={
+                "embedding_provider": "hashing",
+                "embedding_cache_path": str(Path(tmp_dir) / "embeddings.sqlite"),
+                "faiss_index_path": str(Path(tmp_dir) / "index"),
+            }
+        )
+        store = FAISSVectorStore(settings=settings)
+        await store.initialize()
+        report = await stress_test(store)
+
+    for key, value in report.items():
+        print(f"{key}: {value:.2f}" if isinstance(value, float) else f"{key}: {value}")
+    return 1 if report["inconsistent_results"] or report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
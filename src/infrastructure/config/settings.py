@@ -18,13 +18,49 @@ class Settings(BaseSettings):
 
     github_token: str = Field(default="")
     github_username: str = Field(default="")
+    github_http2: bool = Field(default=True)
+    github_max_connections: int = Field(default=20)
+    github_max_keepalive_connections: int = Field(default=10)
+    github_keepalive_expiry: float = Field(default=30.0)
+    github_connect_timeout: float = Field(default=10.0)
+    github_read_timeout: float = Field(default=30.0)
+    github_fetch_mode: str = Field(default="auto")
+    github_fetch_concurrency: int = Field(default=10)
+    github_fetch_max_concurrency: int = Field(default=32)
+    github_fetch_max_retries: int = Field(default=5)
+    github_cache_path: str = Field(default="./data/github_cache/responses.sqlite")
+    github_cache_max_entries: int = Field(default=10_000)
+
+    repository_source: str = Field(default="github")
+    local_repositories_path: str = Field(default="./data/repositories")
+    index_max_concurrent_repos: int = Field(default=4)
+    index_repo_retries: int = Field(default=2)
 
     google_api_key: str = Field(default="")
     gemini_model: str = Field(default="gemini-2.5-flash")
     gemini_embedding_model: str = Field(default="text-embedding-004")
 
+    embedding_provider: str = Field(default="gemini")
     faiss_index_path: str = Field(default="./data/faiss_index")
     embedding_dimension: int = Field(default=768)
+    document_compression: str = Field(default="none")
+    index_compaction_bytes: int = Field(default=64 * 1024 * 1024)
+    index_reload_interval: float = Field(default=2.0)
+    index_type: str = Field(default="auto")
+    index_target_recall: float = Field(default=0.95)
+    index_flat_threshold: int = Field(default=20_000)
+    vector_storage: str = Field(default="float32")
+    vector_rerank_factor: int = Field(default=4)
+    embedding_cache_path: str = Field(default="./data/embedding_cache/embeddings.sqlite")
+    embedding_cache_max_entries: int = Field(default=200_000)
+    embedding_batch_size: int = Field(default=100)
+    embedding_max_concurrency: int = Field(default=4)
+    embedding_max_retries: int = Field(default=5)
+    query_embedding_cache_size: int = Field(default=1024)
+    search_result_cache_size: int = Field(default=1024)
+    search_mmr_lambda: float = Field(default=0.7)
+    vectorstore_threads: int = Field(default=4)
+    vectorstore_queue_size: int = Field(default=64)
 
     bio_file_path: str = Field(default="./my_bio.md")
 
@@ -0,0 +1,229 @@
+"""Persistent HTTP cache revalidated with ETag and Last-Modified.
+
+Responses that carry a validator are stored per URL. Later requests for
+the same URL are sent with ``If-None-Match``/``If-Modified-Since`` and a
+``304 Not Modified`` answer is served from the cache, which GitHub does not
+count against the API rate limit.
+"""
+
+import asyncio
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import httpx
+
+from src.infrastructure.config.settings import get_settings
+
+# Headers describing the stored body, which a 304 must not overwrite.
+BODY_HEADERS = {"content-length", "content-encoding", "content-type", "transfer-encoding"}
+
+# Endpoints worth caching: repository listings, branch heads and trees are
+# requested on every re-index and rarely change, while file contents are only
+# fetched when their SHA changed and would just fill the cache.
+CACHEABLE_PATHS = (
+    re.compile(r"/users/[^/]+/repos"),
+    re.compile(r"/repos/[^/]+/[^/]+/branches/.+"),
+    re.compile(r"/repos/[^/]+/[^/]+/git/trees/.+"),
+)
+
+
+@dataclass
+class CachedResponse:
+    """A stored response with its undecoded body."""
+
+    status_code: int
+    headers: list[tuple[str, str]]
+    body: bytes
+
+
+class HTTPCache:
+    """SQLite-backed store of validated responses with least-recently-used eviction.
+
+    Entries are keyed by URL and a hash of the ``Authorization`` header, so
+    responses fetched with one token are never served to another. Calls may
+    come from worker threads and are serialized on the single connection.
+    """
+
+    def __init__(self, path: Path, max_entries: int) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self.revalidated = 0
+        self.fetched = 0
+        self._lock = threading.Lock()
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " status INTEGER NOT NULL,"
+            " headers TEXT NOT NULL,"
+            " body BLOB NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)"
+        )
+        self._conn.commit()
+        (self._size,) = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+
+    @staticmethod
+    def key(request: httpx.Request) -> str:
+        """Cache key of a request."""
+        auth = request.headers.get("authorization", "")
+        return f"{request.url}#{hashlib.sha256(auth.encode()).hexdigest()[:16]}"
+
+    def get(self, key: str) -> CachedResponse | None:
+        """Look up a stored response and mark it as recently used."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, headers, body FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key)
+            )
+            self._conn.commit()
+        status, headers, body = row
+        return CachedResponse(status, [tuple(h) for h in json.loads(headers)], body)
+
+    def put(self, key: str, response: CachedResponse) -> None:
+        """Store a response, evicting the least recently used entries beyond the limit."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, status, headers, body, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (
+                    key,
+                    response.status_code,
+                    json.dumps(response.headers),
+                    response.body,
+                    time.time(),
+                ),
+            )
+            (self._size,) = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+
+            excess = self._size - self.max_entries
+            if excess > 0:
+                cursor = self._conn.execute(
+                    "DELETE FROM responses WHERE rowid IN "
+                    "(SELECT rowid FROM responses ORDER BY last_used LIMIT ?)",
+                    (excess,),
+                )
+                self._size -= cursor.rowcount
+            self._conn.commit()
+
+    def stats(self) -> dict[str, int]:
+        """Get cache size and how many responses were revalidated or fetched in full."""
+        return {"entries": self._size, "revalidated": self.revalidated, "fetched": self.fetched}
+
+
+class CachingTransport(httpx.AsyncBaseTransport):
+    """httpx transport that revalidates GET requests against an ``HTTPCache``.
+
+    Only requests whose path matches one of ``cacheable_paths`` go through
+    the cache, and only JSON responses with an ``ETag`` or ``Last-Modified``
+    header are stored, so file contents and streamed downloads such as
+    tarballs pass through untouched. A revalidated response is returned as the stored 200 response, updated
+    with the headers of the 304 (such as current rate limits), and with
+    ``response.extensions["from_cache"]`` set.
+    """
+
+    def __init__(
+        self,
+        transport: httpx.AsyncBaseTransport,
+        cache: HTTPCache,
+        cacheable_paths: tuple[re.Pattern[str], ...] = CACHEABLE_PATHS,
+    ) -> None:
+        self._transport = transport
+        self.cache = cache
+        self.cacheable_paths = cacheable_paths
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if request.method != "GET" or not any(
+            pattern.fullmatch(request.url.path) for pattern in self.cacheable_paths
+        ):
+            return await self._transport.handle_async_request(request)
+
+        key = self.cache.key(request)
+        cached = await asyncio.to_thread(self.cache.get, key)
+        if cached is not None:
+            headers = httpx.Headers(cached.headers)
+            if "etag" in headers:
+                request.headers["If-None-Match"] = headers["etag"]
+            if "last-modified" in headers:
+                request.headers["If-Modified-Since"] = headers["last-modified"]
+
+        response = await self._transport.handle_async_request(request)
+
+        if response.status_code == 304 and cached is not None:
+            await response.aclose()
+            self.cache.revalidated += 1
+            headers = httpx.Headers(cached.headers)
+            for name, value in response.headers.items():
+                if name not in BODY_HEADERS:
+                    headers[name] = value
+            return httpx.Response(
+                cached.status_code,
+                headers=headers,
+                stream=httpx.ByteStream(cached.body),
+                extensions={**response.extensions, "from_cache": True},
+            )
+
+        if not self._cacheable(response):
+            return response
+
+        self.cache.fetched += 1
+        body = b"".join([chunk async for chunk in response.aiter_raw()])
+        await response.aclose()
+        stored = CachedResponse(response.status_code, response.headers.multi_items(), body)
+        await asyncio.to_thread(self.cache.put, key, stored)
+        return httpx.Response(
+            response.status_code,
+            headers=stored.headers,
+            stream=httpx.ByteStream(body),
+            extensions=response.extensions,
+        )
+
+    @staticmethod
+    def _cacheable(response: httpx.Response) -> bool:
+        headers = response.headers
+        return (
+            response.status_code == 200
+            and ("etag" in headers or "last-modified" in headers)
+            and "json" in headers.get("content-type", "")
+            and "no-store" not in headers.get("cache-control", "")
+        )
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+_http_cache: HTTPCache | None = None
+
+
+def get_http_cache() -> HTTPCache | None:
+    """Get the shared GitHub response cache, or None if ``GITHUB_CACHE_PATH`` is empty."""
+    global _http_cache
+    settings = get_settings()
+    if _http_cache is None and settings.github_cache_path:
+        _http_cache = HTTPCache(
+            Path(settings.github_cache_path),
+            max_entries=settings.github_cache_max_entries,
+        )
+    return _http_cache
+
+
+def cached_transport(**kwargs) -> httpx.AsyncBaseTransport:
+    """An ``httpx.AsyncHTTPTransport`` revalidating through the shared cache."""
+    transport = httpx.AsyncHTTPTransport(**kwargs)
+    cache = get_http_cache()
+    return CachingTransport(transport, cache) if cache is not None else transport
@@ -13,6 +13,7 @@ settings = get_settings()
 from src.infrastructure.persistence.mongodb.connection import init_mongodb, close_mongodb
 from src.presentation.api.v1.router import api_router
 from src.infrastructure.ai.graph.chat_graph import get_chat_graph
+from src.infrastructure.ai.mcp.github_client import get_github_client
 
 
 class ProxyHeadersMiddleware:
@@ -42,15 +43,11 @@ async def lifespan(app: FastAPI):
     """Application lifespan manager for startup and shutdown."""
     print(f"Starting {settings.app_name}...")
     await init_mongodb()
+    get_github_client().open()
 
     if settings.google_api_key:
-        print("Initializing AI chat system...")
-        try:
-            chat_graph = get_chat_graph()
-            await chat_graph.initialize()
-            print("AI chat system initialized successfully!")
-        except Exception as e:
-            print(f"Warning: Failed to initialize AI chat system: {e}")
+        print("Initializing AI chat system in the background...")
+        get_chat_graph().start()
     else:
         print("Skipping AI chat initialization (no GOOGLE_API_KEY configured)")
 
@@ -59,6 +56,9 @@ async def lifespan(app: FastAPI):
     yield
 
     print(f"Shutting down {settings.app_name}...")
+    if settings.google_api_key:
+        await get_chat_graph().stop()
+    await get_github_client().close()
     await close_mongodb()
     print(f"{settings.app_name} shut down complete.")
 
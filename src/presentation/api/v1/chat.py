@@ -18,6 +18,7 @@ from src.presentation.schemas.chat_schemas import (
     ChatResponse,
     IndexStatsResponse,
     IndexResponse,
+    RepositoryIndexResponse,
 )
 
 router = APIRouter(prefix="/chat", tags=["chat"])
@@ -136,12 +137,46 @@ async def get_index_stats(
 
 @router.post("/index/repos", response_model=IndexResponse)
 async def index_repositories(
+    force: bool = False,
     chat_service: ChatService = Depends(get_chat_service),
     _: dict = Depends(get_current_admin),
 ) -> IndexResponse:
-    """Manually trigger repository re-indexing (admin only)."""
+    """Manually trigger repository re-indexing (admin only).
+
+    Only changed files are re-indexed unless ``force`` is set.
+    """
     try:
-        result = await chat_service.index_repositories()
+        result = await chat_service.index_repositories(force=force)
         return IndexResponse(**result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Indexing error: {str(e)}")
+
+
+@router.post("/index/rollback", response_model=IndexStatsResponse)
+async def rollback_index(
+    chat_service: ChatService = Depends(get_chat_service),
+    _: dict = Depends(get_current_admin),
+) -> IndexStatsResponse:
+    """Switch back to the index served before the last full rebuild (admin only)."""
+    try:
+        stats = await chat_service.rollback_index()
+        return IndexStatsResponse(**stats)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Rollback error: {str(e)}")
+
+
+@router.post("/index/repos/{repo_name}", response_model=RepositoryIndexResponse)
+async def index_repository(
+    repo_name: str,
+    branch: str = "main",
+    chat_service: ChatService = Depends(get_chat_service),
+    _: dict = Depends(get_current_admin),
+) -> RepositoryIndexResponse:
+    """Re-index a single repository, fetching only changed files (admin only)."""
+    try:
+        result = await chat_service.index_repository(repo_name, branch)
+        return RepositoryIndexResponse(**result)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Indexing error: {str(e)}")
@@ -1,11 +1,53 @@
-"""Health check endpoint."""
+"""Health check endpoints."""
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Response, status
+
+from src.infrastructure.ai.graph.chat_graph import get_chat_graph
+from src.infrastructure.config.settings import get_settings
+from src.infrastructure.persistence.mongodb.connection import get_client
 
 router = APIRouter(tags=["health"])
 
 
 @router.get("/health")
 async def health_check():
-    """Health check endpoint for container orchestration."""
+    """Liveness check for container orchestration.
+
+    Succeeds as long as the process serves requests, including while the
+    code index is still being built in the background.
+    """
     return {"status": "healthy", "service": "KaminAI API"}
+
+
+@router.get("/health/ready")
+async def readiness_check(response: Response):
+    """Readiness check: MongoDB is reachable.
+
+    The code index is reported but does not affect readiness, since chat
+    answers from the bio and blog until it is ready.
+    """
+    try:
+        await get_client().admin.command("ping")
+        mongodb = "ok"
+    except Exception as e:
+        mongodb = f"error: {e}"
+
+    if not get_settings().google_api_key:
+        code_index = "disabled"
+    else:
+        chat_graph = get_chat_graph()
+        if chat_graph.index_ready:
+            code_index = "ready"
+        elif chat_graph.startup_error:
+            code_index = f"error: {chat_graph.startup_error}"
+        else:
+            code_index = "indexing"
+
+    ready = mongodb == "ok"
+    if not ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return {
+        "status": "ready" if ready else "not ready",
+        "service": "KaminAI API",
+        "checks": {"mongodb": mongodb, "code_index": code_index},
+    }
@@ -1,6 +1,6 @@
 """Pydantic schemas for chat API."""
 
-from typing import Literal
+from typing import Any, Literal
 
 from pydantic import BaseModel, Field
 
@@ -40,11 +40,39 @@ class IndexStatsResponse(BaseModel):
     total_documents: int = Field(description="Total number of indexed documents")
     projects: list[str] = Field(description="List of indexed project names")
     file_types: list[str] = Field(description="List of indexed file types")
+    generation: str = Field(default="", description="Index generation being served")
+    embedding_failures: int = Field(
+        default=0, description="Chunks dropped because they could not be embedded"
+    )
+    github_connections: dict[str, dict[str, Any]] = Field(
+        default_factory=dict, description="GitHub API connection reuse per host"
+    )
+    github_cache: dict[str, int] = Field(
+        default_factory=dict, description="GitHub response cache size and revalidations"
+    )
+    github_fetch: dict[str, Any] = Field(
+        default_factory=dict,
+        description="GitHub fetch concurrency, rate limit and per-repository progress",
+    )
 
 
 class IndexResponse(BaseModel):
     """Response body for indexing endpoint."""
 
     repositories_indexed: int = Field(description="Number of repositories indexed")
-    total_files: int = Field(description="Total number of files indexed")
+    total_files: int = Field(description="Number of added or changed files indexed")
+    files_removed: int = Field(default=0, description="Number of deleted files removed")
+    files_unchanged: int = Field(default=0, description="Number of files skipped as unchanged")
     repositories: list[str] = Field(description="Names of indexed repositories")
+    repositories_failed: list[str] = Field(
+        default_factory=list, description="Names of repositories that failed to index"
+    )
+
+
+class RepositoryIndexResponse(BaseModel):
+    """Response body for single-repository indexing endpoint."""
+
+    repository: str = Field(description="Name of the re-indexed repository")
+    files_updated: int = Field(description="Number of added or changed files indexed")
+    files_removed: int = Field(description="Number of deleted files removed")
+    files_unchanged: int = Field(description="Number of files skipped as unchanged")